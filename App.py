@@ -1,15 +1,16 @@
 import streamlit as st
-import joblib
 import numpy as np
 import pandas as pd
-import shap
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-from wordcloud import WordCloud
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-import io
+# shap, matplotlib, plotly, wordcloud y reportlab se importan al usarse por primera vez
+import os
+import inference
+from inference import INGREDIENTES_DOMINIO, PALABRAS_DOMINIO, feature_names, preprocess
+from explain import build_explainers
+import eda_artifacts
+from prediction_cache import PredictionCache, clave_prediccion
+from history import PredictionHistory
+from sweep import price_grid, response_surface, sweep
+from similarity import load_similarity_index
 
 # Configuración de la página
 st.set_page_config(
@@ -25,72 +26,181 @@ Bienvenido a esta aplicación interactiva para predecir el rating de productos b
 Utiliza un modelo entrenado con datos de productos y sus reseñas. ¡Introduce tus datos y obtén una predicción!
 """)
 
-# Cargar modelos y preprocesador
+# Cargar modelos y preprocesador, y el router que decide qué modelo puntúa cada producto
+# (router.json junto a los .pkl o, si no existe, bajo/alto por número de reseñas)
 @st.cache_resource
 def load_assets():
-    preprocessor = joblib.load("preprocessor.pkl")
-    model_bajo = joblib.load("modelo_bajo.pkl")
-    model_alto = joblib.load("modelo_alto.pkl")
-    return preprocessor, model_bajo, model_alto
+    preprocessor, model_bajo, model_alto = inference.load_assets()
+    router = inference.load_router(modelos={"modelo_bajo.pkl": model_bajo, "modelo_alto.pkl": model_alto})
+    return preprocessor, model_bajo, model_alto, router
 
-preprocessor, model_bajo, model_alto = load_assets()
+preprocessor, model_bajo, model_alto, router = load_assets()
 
-def predict_rating(input_data, preprocessor, model_bajo, model_alto):
+# Caché de predicciones compartida por todas las sesiones (en disco si se indica una ruta)
+@st.cache_resource
+def load_prediction_cache():
+    return PredictionCache(
+        maxsize=int(os.environ.get("PREDICTION_CACHE_SIZE", 1024)),
+        ruta=os.environ.get("PREDICTION_CACHE_PATH"),
+        version=inference.assets_version()
+    )
+
+prediction_cache = load_prediction_cache()
+
+# Explicadores SHAP: uno por modelo, construidos una sola vez para todas las sesiones
+SHAP_BUDGET_MS = float(os.environ.get("SHAP_BUDGET_MS", 500))
+
+@st.cache_resource
+def load_explainers():
+    max_trees = os.environ.get("SHAP_MAX_TREES")
+    return build_explainers(router.modelos, int(max_trees) if max_trees else None), feature_names(preprocessor)
+
+def predict_rating(input_data, preprocessor, router, cache=None):
     try:
-        # Crear un DataFrame con los datos de entrada
-        df_input = pd.DataFrame([input_data])
-        X_input = df_input[['Tipo', 'Product_Description', 'Price']]
+        def calcular():
+            # Crear un DataFrame con los datos de entrada
+            df_input = pd.DataFrame([input_data])
 
-        # Preprocesar los datos
-        X_processed = preprocessor.transform(X_input)
-        X_processed_dense = X_processed.toarray()
+            # Preprocesar los datos (matriz dispersa CSR, sin densificar)
+            X_processed = preprocess(df_input, preprocessor)
 
-        # Elegir el modelo correcto basado en el número de reseñas
-        model = model_bajo if input_data['Reviews'] < 60 else model_alto
+            # El router elige el modelo del producto y realiza la predicción
+            prediction, _ = router.predict(X_processed, df_input)
 
-        # Realizar la predicción
-        prediction = model.predict(X_processed_dense)
+            return float(prediction[0]), X_processed
 
-        return prediction[0], X_processed_dense
+        if cache is None:
+            return calcular()
+        return cache.get_or_compute(clave_prediccion(input_data, preprocessor, router), calcular)
     except Exception as e:
         raise ValueError(f"Error en el preprocesamiento: {e}")
 
 # -------------------------
-# Creación de pestañas
+# Artefactos EDA precalculados (una vez por versión del dataset)
 # -------------------------
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
+RUTA_DATOS = "datos_productos.csv"
+
+@st.cache_data(show_spinner=False)
+def load_eda_artifacts(version):
+    return eda_artifacts.load_artifacts(RUTA_DATOS, version)
+
+@st.cache_data(show_spinner=False)
+def eda_wordcloud(version):
+    from wordcloud import WordCloud
+
+    frecuencias = load_eda_artifacts(version)["frecuencias"]
+    return WordCloud(width=600, height=290, background_color='white').generate_from_frequencies(frecuencias).to_array()
+
+@st.cache_resource(show_spinner=False)
+def eda_figures(version):
+    import plotly.express as px
+
+    artefactos = load_eda_artifacts(version)
+    df = artefactos["dispersion"]
+    figuras = {}
+
+    # Histograma a partir de los bins precalculados
+    conteos = artefactos["histograma"]["conteos"]
+    bordes = artefactos["histograma"]["bordes"]
+    fig = px.bar(
+    x=(bordes[:-1] + bordes[1:]) / 2,
+    y=conteos,
+    title="Distribución de Ratings",
+    labels={"x": "Star_Rating", "y": "count"},
+    color_discrete_sequence=["green"]  # Color de las barras en verde
+    )
+
+    # Agregar bordes negros a las barras
+    fig.update_traces(width=np.diff(bordes), marker=dict(line=dict(color="black", width=1)))
+    fig.update_layout(bargap=0)
+    figuras["histograma"] = fig
+
+    # Gráfico de dispersión
+    figuras["precio"] = px.scatter(
+        df,
+        x="Price",
+        y="Star_Rating",
+        color="Tipo",
+        title="Relación entre Precio y Rating",
+        template="plotly_dark"
+    )
+
+    # Crear el gráfico de dispersión con Plotly
+    scatter_fig = px.scatter(
+        df,
+        x="Reviews",
+        y="Star_Rating",
+        color="Tipo",
+        title="Relación entre Reviews y Star_Rating",
+        template="plotly_dark",  # Tema oscuro
+        opacity=0.7,  # Transparencia de los puntos
+        labels={"Reviews": "Número de Reviews", "Star_Rating": "Rating"},  # Etiquetas personalizadas
+        
+    )
+
+    # Agregar líneas de umbral
+    scatter_fig.add_hline(
+        y=3.5,
+        line_dash="dash",
+        line_color="blue",
+        annotation_text="Umbral Star_Rating (y = 3.5)",
+        annotation_position="top right",
+    )
+    scatter_fig.add_vline(
+        x=60,
+        line_dash="dash",
+        line_color="red",
+        annotation_text="Umbral Reviews (x = 60)",
+        annotation_position="top left",
+    )
+
+    # Personalizar la leyenda
+    scatter_fig.update_layout(
+        legend=dict(
+            orientation="v",  # Orientación vertical
+            yanchor="top",  # Alineación vertical
+            y=0.5,          # Posición vertical (centrado)
+            xanchor="left",  # Alineación horizontal
+            x=1.02,         # Posición horizontal (al lado derecho)
+            title_text="Tipo"  # Título de la leyenda
+        ),
+        height=600,  # Altura del gráfico
+        margin=dict(l=10, r=10, t=40, b=10),  # Márgenes del gráfico
+    )
+    figuras["reviews"] = scatter_fig
+    return figuras
+
+# Índice de productos similares del catálogo (similarity_index/, se reconstruye si cambia el dataset)
+@st.cache_resource(show_spinner=False)
+def load_similarity(version):
+    return load_similarity_index(RUTA_DATOS, assets=(preprocessor, model_bajo, model_alto))
+
+# -------------------------
+# Creación de secciones (solo se ejecuta la sección visible)
+# -------------------------
+SECCIONES = [
     "🌟 Predicción", 
     "📊 Exploración", 
     "🔍 SHAP", 
     "📈 Informe del producto", 
     "📝 Historial"
-])
+]
+seccion = st.radio("Sección", SECCIONES, horizontal=True, label_visibility="collapsed", key="seccion")
 
 # -------------------------
 # TAB 1: Predicción
 # -------------------------
-with tab1:
+if seccion == SECCIONES[0]:
     st.header("🌟 Predicción del Rating")
     with st.form("prediction_form"):
         st.subheader("🧼 Ingrese los datos del producto:")
         tipo = st.selectbox("Tipo de producto", ["champu", "jabon", "exfoliante"])
-        # Listas de palabras e ingredientes
-        palabras_dominio = [
-            'acne', 'aceites', 'afeitado', 'anticaida', 'aroma', 'barba', 'caida', 'canas', 'cara', 'coloracion', 'corporal', 'crecimiento', 'cuerpo',
-            'delicada', 'ecologico', 'esencial', 'exfoliante', 'facial', 'fortalecer', 'fragancia', 'graso', 'hidrata', 'marina', 'natural', 'organico',
-            'parabenos', 'parfum', 'pelo', 'poros', 'tinte', 'tradicionales', 'vegano'
-        ]
-        ingredientes_dominio = [
-            'aceite de almendras', 'aceite de argan', 'aceite de coco', 'aceite de jojoba', 'aceite de ricino', 'aceite de romero', 'acido-salicilico',
-            'aloe vera', 'antioxidantes', 'arcilla', 'cafe', 'cafeina', 'canela', 'carbon', 'citric', 'curcuma', 'glicerina', 'ginseng', 'jengibre', 'madera',
-            'mango', 'manteca de karite', 'menta', 'minerales', 'sal rosa', 'sandalo', 'vitamina c', 'zinc'
-        ]
         # Bloque 1: Palabras del dominio
         st.subheader("📝 Palabras del Dominio")
-        palabras_seleccionadas = st.multiselect("Selecciona palabras:", palabras_dominio, default=[])
+        palabras_seleccionadas = st.multiselect("Selecciona palabras:", PALABRAS_DOMINIO, default=[])
         # Bloque 2: Ingredientes
         st.subheader("🌿 Ingredientes")
-        ingredientes_seleccionados = st.multiselect("Selecciona ingredientes:", ingredientes_dominio, default=[])
+        ingredientes_seleccionados = st.multiselect("Selecciona ingredientes:", INGREDIENTES_DOMINIO, default=[])
         # Combinar las selecciones en una descripción
         product_description = " ".join(palabras_seleccionadas + ingredientes_seleccionados)
         st.subheader("💶 Precio del producto (€)")
@@ -111,131 +221,161 @@ with tab1:
             }
 
             # Realizar la predicción
-            predicted_rating, X_processed_dense = predict_rating(input_data, preprocessor, model_bajo, model_alto)
+            predicted_rating, X_processed = predict_rating(input_data, preprocessor, router, cache=prediction_cache)
 
             # Guardar todos los valores en session_state
             st.session_state.predicted_rating = float(predicted_rating)
+            st.session_state.X_processed = X_processed
+            st.session_state.tipo = tipo
             st.session_state.product_description = product_description
             st.session_state.price = price
             st.session_state.reviews = reviews
+            st.session_state.barrido = None
 
             st.success(f"🌟 El rating predicho es: {predicted_rating:.2f} ⭐️")
         except Exception as e:
             st.error(f"❌ Error al hacer la predicción: {str(e)}")
             st.session_state.predicted_rating = None  # Limpiar en caso de error
+            st.session_state.X_processed = None
+
+    # Productos del catálogo más parecidos al predicho (Tipo y descripción) con su rating real
+    if st.session_state.get('X_processed') is not None:
+        st.subheader("🔎 Productos similares del catálogo")
+        try:
+            similares = load_similarity(eda_artifacts.dataset_version(RUTA_DATOS)).similar(
+                st.session_state.X_processed, [st.session_state.tipo], k=5
+            )
+            if similares.empty:
+                st.info("No hay productos del catálogo con palabras o Tipo en común.")
+            else:
+                st.dataframe(
+                    similares.drop(columns="consulta").rename(columns={
+                        "Product_Description": "Descripción", "Price": "Precio", "Star_Rating": "Rating real"
+                    }),
+                    hide_index=True,
+                    column_config={"Similitud": st.column_config.ProgressColumn("Similitud", min_value=0.0, max_value=1.0)}
+                )
+                st.caption(f"Rating medio de los similares: {similares['Star_Rating'].mean():.2f} ⭐️")
+        except Exception as e:
+            st.warning(f"⚠️ No se pudieron buscar productos similares: {str(e)}")
+
+    # Barrido what-if alrededor del último producto predicho: rejilla de precios x ingredientes
+    # añadidos x Tipo, predicha en un solo lote (ver sweep.py)
+    if st.session_state.get('predicted_rating') is not None:
+        with st.expander("🔬 Barrido de precio e ingredientes", expanded=False):
+            with st.form("sweep_form"):
+                precio_base = float(st.session_state.price)
+                rango_precios = st.slider(
+                    "Rango de precios (€)", 0.0, max(100.0, 2 * precio_base),
+                    (round(precio_base / 2, 1), max(1.0, round(precio_base * 2, 1)))
+                )
+                pasos = st.slider("Puntos de precio", 2, 50, 10)
+                ingredientes_barrido = st.multiselect(
+                    "Ingredientes a añadir", INGREDIENTES_DOMINIO,
+                    default=[i for i in INGREDIENTES_DOMINIO if i not in st.session_state.product_description]
+                )
+                max_tamano = st.selectbox("Ingredientes añadidos por variante (como máximo)", [1, 2], index=0)
+                tipos_barrido = st.multiselect("Tipos", ["champu", "jabon", "exfoliante"], default=[st.session_state.tipo])
+                calcular_barrido = st.form_submit_button("Calcular barrido")
+
+            if calcular_barrido:
+                try:
+                    base = {
+                        "Tipo": st.session_state.tipo,
+                        "Product_Description": st.session_state.product_description,
+                        "Reviews": st.session_state.reviews
+                    }
+                    st.session_state.barrido = sweep(
+                        base, price_grid(*rango_precios, pasos), ingredientes_barrido, tipos_barrido or None,
+                        max_tamano, assets=(preprocessor, model_bajo, model_alto), router=router
+                    )
+                except Exception as e:
+                    st.error(f"⚠️ Error en el barrido: {str(e)}")
+                    st.session_state.barrido = None
+
+            tabla_barrido = st.session_state.get("barrido")
+            if tabla_barrido is not None:
+                import plotly.express as px
+
+                superficie = response_surface(tabla_barrido)
+                etiquetas = [" · ".join(map(str, fila)) if isinstance(fila, tuple) else str(fila) for fila in superficie.index]
+                fig = px.imshow(
+                    superficie.to_numpy(), x=[f"{precio:.2f} €" for precio in superficie.columns], y=etiquetas,
+                    labels=dict(x="Precio", y="", color="Rating"), aspect="auto", color_continuous_scale="Viridis",
+                    template="plotly_dark", height=max(400, 22 * len(etiquetas))
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                mejor = tabla_barrido.loc[tabla_barrido["Predicted_Rating"].idxmax()]
+                st.success(
+                    f"🏆 Mejor variante: {mejor['Predicted_Rating']:.2f} ⭐️ con {mejor['Ingredientes']} "
+                    f"a {mejor['Price']:.2f} € ({mejor['Tipo']}) — {len(tabla_barrido):,} variantes"
+                )
+                st.download_button(
+                    label="📥 Descargar barrido (CSV)",
+                    data=lambda: tabla_barrido.to_csv(index=False).encode('utf-8'),
+                    file_name='barrido_precio_ingredientes.csv',
+                    mime='text/csv',
+                    key='sweep_download'
+                )
 # -------------------------
 # TAB 2: Exploración (EDA)
 # -------------------------
-with tab2:
+if seccion == SECCIONES[1]:
     st.header("📊 Análisis Exploratorio de Datos (EDA)")
     st.markdown("Explora las características clave del dataset utilizado para entrenar el modelo.")
 
-    # Cargar datos
-    df = pd.read_csv("datos_productos.csv")
+    # Cargar artefactos precalculados
+    version_datos = eda_artifacts.dataset_version(RUTA_DATOS)
+    artefactos = load_eda_artifacts(version_datos)
+    figuras = eda_figures(version_datos)
 
     # Resumen de datos
     if st.checkbox("📋 Mostrar resumen de datos"):
-        st.write(df.describe())
+        st.write(artefactos["resumen"])
 
     # Gráficos interactivos
     st.subheader("📈 Distribución de Ratings")
-    fig = px.histogram(
-    df,
-    x="Star_Rating",
-    nbins=10,
-    title="Distribución de Ratings",
-    color_discrete_sequence=["green"]  # Color de las barras en verde
-    )
-
-    # Agregar bordes negros a las barras
-    fig.update_traces(marker=dict(line=dict(color="black", width=1)))
-
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(figuras["histograma"], use_container_width=True)
 
     st.subheader("📝 Palabras más frecuentes en Product_Description")
-    text = " ".join(df['Product_Description'].dropna())
-    wordcloud = WordCloud(width=600, height=290, background_color='white').generate(text)
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.imshow(wordcloud, interpolation='bilinear')
-    ax.axis('off')
-    st.pyplot(fig)
+    st.image(eda_wordcloud(version_datos), use_container_width=True)
 
     # Gráfico de dispersión
     st.subheader("🔍 Relación entre Precio y Rating")
-    scatter_fig = px.scatter(
-        df,
-        x="Price",
-        y="Star_Rating",
-        color="Tipo",
-        title="Relación entre Precio y Rating",
-        template="plotly_dark"
-    )
-    st.plotly_chart(scatter_fig, use_container_width=True)
+    st.plotly_chart(figuras["precio"], use_container_width=True)
 
 
     # Gráfico de dispersión con umbrales
     st.subheader("🔍 Relación entre Reviews y Star_Rating con umbrales")
 
-    # Crear el gráfico de dispersión con Plotly
-    scatter_fig = px.scatter(
-        df,
-        x="Reviews",
-        y="Star_Rating",
-        color="Tipo",
-        title="Relación entre Reviews y Star_Rating",
-        template="plotly_dark",  # Tema oscuro
-        opacity=0.7,  # Transparencia de los puntos
-        labels={"Reviews": "Número de Reviews", "Star_Rating": "Rating"},  # Etiquetas personalizadas
-        
-    )
-
-    # Agregar líneas de umbral
-    scatter_fig.add_hline(
-        y=3.5,
-        line_dash="dash",
-        line_color="blue",
-        annotation_text="Umbral Star_Rating (y = 3.5)",
-        annotation_position="top right",
-    )
-    scatter_fig.add_vline(
-        x=60,
-        line_dash="dash",
-        line_color="red",
-        annotation_text="Umbral Reviews (x = 60)",
-        annotation_position="top left",
-    )
-
-    # Personalizar la leyenda
-    scatter_fig.update_layout(
-        legend=dict(
-            orientation="v",  # Orientación vertical
-            yanchor="top",  # Alineación vertical
-            y=0.5,          # Posición vertical (centrado)
-            xanchor="left",  # Alineación horizontal
-            x=1.02,         # Posición horizontal (al lado derecho)
-            title_text="Tipo"  # Título de la leyenda
-        ),
-        height=600,  # Altura del gráfico
-        margin=dict(l=10, r=10, t=40, b=10),  # Márgenes del gráfico
-    )
-
     # Mostrar el gráfico en Streamlit
-    st.plotly_chart(scatter_fig, use_container_width=True)
+    st.plotly_chart(figuras["reviews"], use_container_width=True)
 # -------------------------
 # TAB 3: Explicabilidad SHAP
 # -------------------------
-with tab3:
+if seccion == SECCIONES[2]:
     st.header("🔍 Explicabilidad del Modelo")
     try:
         # Usar los datos procesados de la predicción anterior
-        if 'X_processed_dense' in locals():
-            model = model_bajo if reviews < 60 else model_alto
-            explainer = shap.TreeExplainer(model)
-            shap_values = explainer.shap_values(X_processed_dense)
+        X_processed = st.session_state.get('X_processed')
+        if X_processed is not None:
+            import shap
+            import matplotlib.pyplot as plt
+
+            explainers, nombres_features = load_explainers()
+            # Explicar con el modelo que hizo la predicción
+            explicador = explainers[router.route_one({
+                "Tipo": st.session_state.tipo,
+                "Product_Description": st.session_state.product_description,
+                "Price": st.session_state.price,
+                "Reviews": st.session_state.reviews
+            })]
+            X_fila = X_processed[0].toarray()  # Densificar solo la fila explicada
+            shap_values = explicador.shap_values(X_fila, budget_ms=SHAP_BUDGET_MS)
 
             st.subheader("🧐 Explicación de la Predicción")
             fig, ax = plt.subplots()
-            shap.plots.waterfall(shap.Explanation(values=shap_values[0], base_values=explainer.expected_value, data=X_processed_dense[0]), max_display=10, show=False)
+            shap.plots.waterfall(shap.Explanation(values=shap_values[0], base_values=explicador.expected_value, data=X_fila[0], feature_names=list(nombres_features)), max_display=10, show=False)
             st.pyplot(fig)
         else:
             st.info("Realiza una predicción en la pestaña 'Predicción' para generar la explicación SHAP.")
@@ -245,11 +385,16 @@ with tab3:
 # -------------------------
 # TAB 4: Informe del Producto
 # -------------------------
-with tab4:
+if seccion == SECCIONES[3]:
     st.header("📈 Informe del Producto")
     try:
         # Usar los datos procesados de la predicción anterior
-        if 'predicted_rating' in locals():
+        if st.session_state.get('predicted_rating') is not None:
+            predicted_rating = st.session_state.predicted_rating
+            tipo = st.session_state.tipo
+            product_description = st.session_state.product_description
+            price = st.session_state.price
+            reviews = st.session_state.reviews
             # Mostrar métricas principales
             # Personalizar tamaños de fuente
             st.markdown(f"<h2 style='font-size: 21px;'>🌟 Rating Predicho: {predicted_rating:.2f}</h2>", unsafe_allow_html=True)
@@ -272,12 +417,13 @@ with tab4:
 
 # TAB 5: Historial
 # -------------------------
-with tab5:
+if seccion == SECCIONES[4]:
     st.header("🕘 Historial de Predicciones")
     
-    # Inicializar el historial si no existe
-    if "historial" not in st.session_state:
-        st.session_state.historial = []
+    # Inicializar el historial si no existe (columnar: ver history.py)
+    if not isinstance(st.session_state.get("historial"), PredictionHistory):
+        st.session_state.historial = PredictionHistory()
+    historial = st.session_state.historial
     
     # Guardar caso en el historial - CORRECCIÓN PRINCIPAL
     try:
@@ -285,17 +431,13 @@ with tab5:
         if 'predicted_rating' in st.session_state and st.session_state.get('predicted_rating') is not None:
             if st.button("💾 Guardar este caso"):
                 try:
-                    # Crear un registro con los datos actuales
-                    reviews = st.session_state.get('reviews', 0)
-                    registro = {
-                        "Rating": round(float(st.session_state.predicted_rating), 2),
-                        "Descripción": st.session_state.get('product_description', 'N/A'),
-                        "Precio": st.session_state.get('price', 0),
-                        "Reseñas": "Más de 60" if reviews >= 60 else "Menos de 60",
-                        "Fecha y hora": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    # Guardar el registro en el historial
-                    st.session_state.historial.append(registro)
+                    # Guardar el registro en el historial con los datos actuales
+                    historial.append(
+                        float(st.session_state.predicted_rating),
+                        st.session_state.get('product_description', 'N/A'),
+                        st.session_state.get('price', 0),
+                        st.session_state.get('reviews', 0)
+                    )
                     st.success("✅ Caso guardado en el historial")
                 except Exception as e:
                     st.error(f"⚠️ Error al guardar el caso: {str(e)}")
@@ -305,10 +447,9 @@ with tab5:
         st.error(f"⚠️ Error inesperado: {str(e)}")
     
     # Mostrar el historial
-    if st.session_state.historial:
+    if len(historial):
         st.subheader("📋 Historial de casos guardados")
-        df_historial = pd.DataFrame(st.session_state.historial)
-        st.dataframe(df_historial)
+        st.dataframe(historial.to_frame())
         
         # Usar columnas para alinear los controles
         col1, col2 = st.columns([1, 1])
@@ -319,94 +460,24 @@ with tab5:
                 # Contenedor para los botones de exportación
                 export_col1, export_col2 = st.columns(2)
                 
+                # Los ficheros solo se generan al pulsar el botón de descarga (data como función),
+                # no en cada rerun de la página. download_button necesita el fichero completo, así
+                # que los bloques de los generadores se unen en memoria
                 with export_col1:
-                    # Botón para generar y descargar PDF
-                    if st.button("🖨 Generar PDF"):
-                        try:
-                            def generate_pdf(df):
-                                buffer = io.BytesIO()
-                                c = canvas.Canvas(buffer, pagesize=letter)
-                                
-                                # Configuración inicial
-                                c.setFont("Helvetica-Bold", 18)
-                                c.drawCentredString(300, 750, "Historial de Predicciones")
-                                c.setFont("Helvetica", 10)
-                                
-                                # Encabezado de la tabla
-                                x_start = 30
-                                y_start = 700
-                                column_widths = [70, 200, 60, 70, 100]  # Ajusté los anchos para mejor visualización
-                                
-                                columns = ["Rating", "Descripción", "Precio", "Reseñas", "Fecha y hora"]
-                                
-                                # Dibujar encabezados
-                                x_pos = x_start
-                                for i, col in enumerate(columns):
-                                    c.setFont("Helvetica-Bold", 10)
-                                    c.drawString(x_pos, y_start, col)
-                                    x_pos += column_widths[i]
-                                
-                                # Línea bajo encabezados
-                                c.line(x_start, y_start-10, x_start + sum(column_widths), y_start-10)
-                                
-                                # Datos de la tabla
-                                y_pos = y_start - 25
-                                for _, row in df.iterrows():
-                                    x_pos = x_start
-                                    for i, value in enumerate(row):
-                                        c.setFont("Helvetica", 9)  # Reduje el tamaño de fuente
-                                        text = str(value)
-                                        
-                                        # Manejar texto largo para descripción
-                                        if i == 1 and len(text) > 25:  # Ajusté el límite de caracteres
-                                            parts = [text[j:j+25] for j in range(0, len(text), 25)]
-                                            for k, part in enumerate(parts):
-                                                c.drawString(x_pos, y_pos - (k*12), part)
-                                        else:
-                                            c.drawString(x_pos, y_pos, text)
-                                        
-                                        x_pos += column_widths[i]
-                                    
-                                    # Línea horizontal entre filas
-                                    c.line(x_start, y_pos-15, x_start + sum(column_widths), y_pos-15)
-                                    y_pos -= 30 + (12 * ((len(text)//25) if i == 1 and len(text) > 25 else 0))
-                                    
-                                    # Nueva página si es necesario
-                                    if y_pos < 50:
-                                        c.showPage()
-                                        y_pos = 700
-                                        c.setFont("Helvetica-Bold", 18)
-                                        c.drawCentredString(300, 750, "Historial de Predicciones (cont.)")
-                                        c.setFont("Helvetica", 10)
-                                        x_pos = x_start
-                                        for i, col in enumerate(columns):
-                                            c.setFont("Helvetica-Bold", 10)
-                                            c.drawString(x_pos, y_pos, col)
-                                            x_pos += column_widths[i]
-                                        c.line(x_start, y_pos-10, x_start + sum(column_widths), y_pos-10)
-                                        y_pos -= 25
-                                
-                                c.save()
-                                buffer.seek(0)
-                                return buffer
-                            
-                            pdf_buffer = generate_pdf(df_historial)
-                            st.download_button(
-                                label="⬇️ Descargar PDF",
-                                data=pdf_buffer.getvalue(),
-                                file_name='historial_predicciones.pdf',
-                                mime='application/pdf',
-                                key='pdf_download'
-                            )
-                        except Exception as e:
-                            st.error(f"⚠️ Error al generar el PDF: {str(e)}")
+                    # Botón para descargar PDF, generado página a página
+                    st.download_button(
+                        label="🖨 Descargar PDF",
+                        data=lambda: b"".join(historial.iter_pdf()),
+                        file_name='historial_predicciones.pdf',
+                        mime='application/pdf',
+                        key='pdf_download'
+                    )
                 
                 with export_col2:
-                    # Botón para descargar CSV
-                    csv_data = df_historial.to_csv(index=False).encode('utf-8')
+                    # Botón para descargar CSV, generado por bloques de filas
                     st.download_button(
                         label="📥 Descargar CSV",
-                        data=csv_data,
+                        data=lambda: b"".join(historial.iter_csv()),
                         file_name='historial_predicciones.csv',
                         mime='text/csv',
                         key='csv_download'
@@ -415,7 +486,7 @@ with tab5:
         with col2:
             # Botón para limpiar el historial
             if st.button("🧹 Limpiar historial", key="clear_history"):
-                st.session_state.historial = []
+                historial.clear()
                 st.success("Historial limpiado correctamente")
     else:
         st.info("No hay casos guardados aún.")
@@ -0,0 +1,96 @@
+# Microbenchmark de CleanText.clean_text: implementación original (re.sub por término)
+# frente al motor precompilado TextNormalizer. Comprueba que la salida es idéntica
+# byte a byte sobre datos_productos.csv antes de medir.
+#
+#   python benchmarks/bench_clean_text.py --repeat 20
+import argparse
+import os
+import re
+import sys
+import time
+import unicodedata
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from transformers import TERMINOS_COMPUESTOS, TextNormalizer  # noqa: E402
+
+
+# Copia literal de la implementación anterior, usada como referencia
+def clean_text_referencia(texto):
+    if not isinstance(texto, str):
+        return ""
+
+    terminos_compuestos = list(TERMINOS_COMPUESTOS)
+
+    for termino in terminos_compuestos:
+        texto = re.sub(
+            r'\b' + re.escape(termino) + r'\b',
+            termino.replace(" ", "-"),
+            texto,
+            flags=re.IGNORECASE
+        )
+
+    texto = re.sub(r'https?://\S+|www\.\S+', '', texto)
+    texto = unicodedata.normalize("NFD", texto).encode("ascii", "ignore").decode("utf-8")
+    texto = re.sub(r'[^\w\s-]', '', texto)
+    texto = texto.lower().strip()
+
+    return texto
+
+
+# Casos extremos que no aparecen en el dataset
+CASOS_EXTRA = [
+    None,
+    3.5,
+    "",
+    "   ",
+    "ACEITE DE COCO y Aloe Vera, Vitamina C!!",
+    "Ácido Salicílico / acido salicilico / ÁCIDO SALICILICO",
+    "visita https://example.com/aloe vera o www.tienda.es/sal rosa ya",
+    "vitamina crecimiento capilar - caida del cabello\tsal rosa\n",
+    "Champú ñandú ﬁno Straße İstanbul K ſal rosa ½ 100€ ™ \x1c\x1f",
+    "aloe-vera aceite_de_coco aceite  de coco",
+    "acİdo salicilico, ACİDO HIALURONICO, Aceite De Coco",
+]
+
+
+def medir(funcion, textos, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for texto in textos:
+            funcion(texto)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return len(textos) / mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark de CleanText.clean_text frente a TextNormalizer.")
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos_productos.csv"))
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    textos = pd.read_csv(args.csv)["Product_Description"].tolist()
+    normalizer = TextNormalizer()
+
+    # Verificación de equivalencia
+    distintos = [
+        texto for texto in textos + CASOS_EXTRA
+        if normalizer(texto).encode("utf-8") != clean_text_referencia(texto).encode("utf-8")
+    ]
+    if distintos:
+        print(f"❌ {len(distintos)} textos con salida distinta, p. ej.: {distintos[0]!r}")
+        sys.exit(1)
+    print(f"✅ Salida idéntica en {len(textos)} descripciones + {len(CASOS_EXTRA)} casos extra")
+
+    antes = medir(clean_text_referencia, textos, args.repeat)
+    despues = medir(normalizer, textos, args.repeat)
+    print(f"Antes:   {antes:12,.0f} docs/s")
+    print(f"Después: {despues:12,.0f} docs/s  (x{despues / antes:.1f})")
+
+
+if __name__ == "__main__":
+    main()
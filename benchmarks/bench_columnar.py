@@ -0,0 +1,61 @@
+# Benchmark de carga: pd.read_csv frente al formato columnar (columnar.py) sobre catálogos
+# sintéticos con el esquema de datos_productos.csv.
+#
+#   python benchmarks/bench_columnar.py --rows 10000 100000
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from columnar import convert, load_columnar, ruta_columnar  # noqa: E402
+from suite import generar_catalogo  # noqa: E402
+
+NUMERICAS = ['Price', 'Star_Rating', 'Reviews', 'Tipo']
+
+
+def mejor_tiempo(funcion, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga de pd.read_csv frente al formato columnar.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+
+    base = pd.read_csv(os.path.join(RAIZ, "datos_productos.csv"))
+    with tempfile.TemporaryDirectory() as directorio:
+        for filas in args.rows:
+            ruta = os.path.join(directorio, f"catalogo_{filas}.csv")
+            generar_catalogo(base, filas).to_csv(ruta, index=False)
+            convert(ruta)
+            destino = ruta_columnar(ruta)
+            casos = [
+                ("read_csv", lambda: pd.read_csv(ruta)),
+                ("read_csv numéricas", lambda: pd.read_csv(ruta, usecols=NUMERICAS)),
+                ("columnar", lambda: load_columnar(destino)),
+                ("columnar numéricas", lambda: load_columnar(destino, NUMERICAS)),
+                ("columnar texto diferido", lambda: load_columnar(destino, as_frame=False)),
+            ]
+            mb = os.path.getsize(ruta) / 2**20
+            print(f"\n{filas:,} filas ({mb:.1f} MB de CSV)")
+            referencia = None
+            for nombre, funcion in casos:
+                segundos = mejor_tiempo(funcion)
+                referencia = referencia or segundos
+                print(f"  {nombre:<24} {segundos * 1000:>10.1f} ms  {referencia / segundos:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
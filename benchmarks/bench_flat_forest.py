@@ -0,0 +1,64 @@
+# Benchmark del predictor de bosques aplanados frente a RandomForestRegressor.predict:
+# latencia p50/p99 con lotes de 1 fila y throughput con lotes de 10k filas, para
+# modelo_bajo y modelo_alto. Comprueba que las predicciones coinciden.
+#
+#   python benchmarks/bench_flat_forest.py --single 1000 --batch 10000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from flat_forest import FlatForest  # noqa: E402
+from inference import load_assets, preprocess  # noqa: E402
+
+
+def latencias(predict, filas):
+    medidas = np.empty(len(filas))
+    for i, fila in enumerate(filas):
+        inicio = time.perf_counter()
+        predict(fila)
+        medidas[i] = time.perf_counter() - inicio
+    return np.percentile(medidas, [50, 99]) * 1000
+
+
+def throughput(predict, X):
+    inicio = time.perf_counter()
+    predict(X)
+    return X.shape[0] / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bosques aplanados frente a RandomForestRegressor.predict.")
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos_productos.csv"))
+    parser.add_argument("--single", type=int, default=1000, help="Llamadas de una fila")
+    parser.add_argument("--batch", type=int, default=10_000, help="Filas del lote grande")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    preprocessor, model_bajo, model_alto = load_assets()
+    df = pd.read_csv(args.csv).sample(args.batch, replace=True, random_state=args.seed).reset_index(drop=True)
+    X = preprocess(df, preprocessor)
+    X_denso = X.toarray()
+    filas = [X_denso[i:i + 1] for i in range(min(args.single, args.batch))]
+
+    print(f"{'modelo':<12} {'motor':<8} {'p50 1 fila (ms)':>16} {'p99 1 fila (ms)':>16} {'filas/s lote':>14}")
+    for nombre, model in (("modelo_bajo", model_bajo), ("modelo_alto", model_alto)):
+        flat = FlatForest.from_model(model)
+        error = np.abs(flat.predict(X) - model.predict(X)).max()
+        if error > 1e-9:
+            print(f"❌ {nombre}: diferencia máxima {error:.2e}")
+            sys.exit(1)
+        for motor, predict in (("sklearn", model.predict), ("flat", flat.predict)):
+            p50, p99 = latencias(predict, filas)
+            print(f"{nombre:<12} {motor:<8} {p50:>16.3f} {p99:>16.3f} {throughput(predict, X):>14,.0f}")
+        print(f"{'':<12} diferencia máxima con sklearn: {error:.1e}")
+
+
+if __name__ == "__main__":
+    main()
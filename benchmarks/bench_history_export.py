@@ -0,0 +1,147 @@
+# Benchmark de la pestaña Historial: lista de dicts + DataFrame + generate_pdf de ReportLab
+# (el código que tenía App.py) frente a PredictionHistory con exportación por generadores.
+# Mide tiempo y, en una segunda pasada con tracemalloc, pico de memoria de mostrar la tabla y de
+# exportar CSV y PDF. Las descripciones se recortan a 20-200 caracteres, como las que compone la
+# pestaña Predicción con las palabras seleccionadas.
+#
+#   python benchmarks/bench_history_export.py --rows 1000 10000 100000
+import argparse
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from history import PredictionHistory  # noqa: E402
+from suite import generar_catalogo  # noqa: E402
+
+
+# generate_pdf tal como estaba en App.py (TAB 5)
+def generate_pdf(df):
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawCentredString(300, 750, "Historial de Predicciones")
+    c.setFont("Helvetica", 10)
+    x_start = 30
+    y_start = 700
+    column_widths = [70, 200, 60, 70, 100]
+    columns = ["Rating", "Descripción", "Precio", "Reseñas", "Fecha y hora"]
+    x_pos = x_start
+    for i, col in enumerate(columns):
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(x_pos, y_start, col)
+        x_pos += column_widths[i]
+    c.line(x_start, y_start-10, x_start + sum(column_widths), y_start-10)
+    y_pos = y_start - 25
+    for _, row in df.iterrows():
+        x_pos = x_start
+        for i, value in enumerate(row):
+            c.setFont("Helvetica", 9)
+            text = str(value)
+            if i == 1 and len(text) > 25:
+                parts = [text[j:j+25] for j in range(0, len(text), 25)]
+                for k, part in enumerate(parts):
+                    c.drawString(x_pos, y_pos - (k*12), part)
+            else:
+                c.drawString(x_pos, y_pos, text)
+            x_pos += column_widths[i]
+        c.line(x_start, y_pos-15, x_start + sum(column_widths), y_pos-15)
+        y_pos -= 30 + (12 * ((len(text)//25) if i == 1 and len(text) > 25 else 0))
+        if y_pos < 50:
+            c.showPage()
+            y_pos = 700
+            c.setFont("Helvetica-Bold", 18)
+            c.drawCentredString(300, 750, "Historial de Predicciones (cont.)")
+            c.setFont("Helvetica", 10)
+            x_pos = x_start
+            for i, col in enumerate(columns):
+                c.setFont("Helvetica-Bold", 10)
+                c.drawString(x_pos, y_pos, col)
+                x_pos += column_widths[i]
+            c.line(x_start, y_pos-10, x_start + sum(column_widths), y_pos-10)
+            y_pos -= 25
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def medir(funcion, memoria):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    segundos = time.perf_counter() - inicio
+    if not memoria:
+        return resultado, segundos, None
+    tracemalloc.start()
+    funcion()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return resultado, segundos, pico / 2**20
+
+
+# Consume el generador bloque a bloque, como hace una descarga en streaming
+def consumir(generador):
+    return sum(len(bloque) for bloque in generador)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación del historial: ReportLab frente a PredictionHistory.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--skip-reportlab-above", type=int, default=100_000,
+                        help="No ejecutar generate_pdf por encima de este número de filas")
+    parser.add_argument("--no-memory", action="store_true", help="Solo tiempos, sin la pasada con tracemalloc")
+    args = parser.parse_args()
+
+    base = pd.read_csv(os.path.join(RAIZ, "datos_productos.csv"))
+    rng = np.random.default_rng(0)
+    for filas in args.rows:
+        catalogo = generar_catalogo(base, filas)
+        longitudes = rng.integers(20, 200, filas)
+        catalogo['Product_Description'] = [texto[:n] for texto, n in zip(catalogo['Product_Description'], longitudes)]
+        ratings = rng.uniform(1, 5, filas)
+        fechas = pd.Timestamp("2026-01-01") + pd.to_timedelta(np.arange(filas), unit="s")
+        registros = [
+            {
+                "Rating": round(float(rating), 2),
+                "Descripción": descripcion,
+                "Precio": precio,
+                "Reseñas": "Más de 60" if reviews >= 60 else "Menos de 60",
+                "Fecha y hora": fecha.strftime("%Y-%m-%d %H:%M:%S"),
+            }
+            for rating, descripcion, precio, reviews, fecha in zip(
+                ratings, catalogo['Product_Description'], catalogo['Price'], catalogo['Reviews'], fechas
+            )
+        ]
+        historial = PredictionHistory()
+        historial.extend(ratings, catalogo['Product_Description'], catalogo['Price'], catalogo['Reviews'], fechas)
+
+        casos = [
+            ("tabla: DataFrame(lista)", lambda: pd.DataFrame(registros)),
+            ("tabla: to_frame", historial.to_frame),
+            ("csv: to_csv", lambda: len(pd.DataFrame(registros).to_csv(index=False).encode('utf-8'))),
+            ("csv: iter_csv", lambda: consumir(historial.iter_csv())),
+        ]
+        if filas <= args.skip_reportlab_above:
+            casos.append(("pdf: generate_pdf", lambda: len(generate_pdf(pd.DataFrame(registros)).getvalue())))
+        casos.append(("pdf: iter_pdf", lambda: consumir(historial.iter_pdf())))
+
+        print(f"\n{filas:,} filas")
+        for nombre, funcion in casos:
+            tamano, segundos, pico = medir(funcion, not args.no_memory)
+            pico = f"pico {pico:>8.1f} MB" if pico is not None else ""
+            tamano = f"{tamano / 2**20:>8.1f} MB" if isinstance(tamano, int) else " " * 11
+            print(f"  {nombre:<26} {segundos:>9.3f} s  {tamano}  {pico}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Benchmark de escalado de ParallelInference con 1, 2, 4 y 8 núcleos sobre un catálogo
+# sintético. Comprueba que las predicciones son idénticas a la ejecución en serie.
+#
+#   python benchmarks/bench_parallel.py --rows 50000 --workers 1 2 4 8
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from inference import load_assets, load_router, predict_routed  # noqa: E402
+from parallel_inference import ParallelInference  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalado de ParallelInference con varios núcleos.")
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos_productos.csv"))
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--chunksize", type=int, default=2_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    preprocessor, model_bajo, model_alto = load_assets()
+    router = load_router(modelos={"modelo_bajo.pkl": model_bajo, "modelo_alto.pkl": model_alto})
+    df = pd.read_csv(args.csv).sample(args.rows, replace=True, random_state=args.seed).reset_index(drop=True)
+
+    inicio = time.perf_counter()
+    serie, _ = predict_routed(df, preprocessor, router)
+    t_serie = time.perf_counter() - inicio
+    print(f"CPUs disponibles: {os.cpu_count()}")
+    print(f"{'núcleos':>8} {'filas/s':>10} {'segundos':>9} {'speedup':>8}")
+    print(f"{'serie':>8} {args.rows / t_serie:>10,.0f} {t_serie:>9.2f} {1:>8.2f}")
+
+    for n in args.workers:
+        with ParallelInference(preprocessor, router, n, n, args.chunksize) as motor:
+            motor.predict(df.head(args.chunksize))  # Arrancar los procesos fuera de la medida
+            inicio = time.perf_counter()
+            predicciones, _ = motor.predict(df)
+            segundos = time.perf_counter() - inicio
+        if not np.array_equal(predicciones, serie):
+            print(f"❌ Resultado distinto de la ejecución en serie con {n} núcleos")
+            sys.exit(1)
+        print(f"{n:>8} {args.rows / segundos:>10,.0f} {segundos:>9.2f} {t_serie / segundos:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
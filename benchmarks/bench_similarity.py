@@ -0,0 +1,125 @@
+# Benchmark del índice de productos similares (similarity.py) frente a la fuerza bruta con scipy
+# (producto CSR x vector sobre todo el catálogo + argpartition). Mide construcción, tamaño en disco,
+# latencia por consulta (p50/p99, una consulta cada vez como en la App), recall@k del IVF frente
+# al resultado exacto y altas incrementales. El recall se cuenta por similitud (un vecino acierta
+# si llega a la k-ésima similitud exacta) porque el catálogo sintético tiene vectores repetidos.
+#
+#   python benchmarks/bench_similarity.py --rows 100000 1000000
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from inference import load_assets, preprocess  # noqa: E402
+from similarity import COLUMNAS_PRODUCTO, SimilarityIndex  # noqa: E402
+from suite import generar_catalogo  # noqa: E402
+
+FILAS_POR_BLOQUE = 100_000
+
+
+# Latencia de funcion(i) para cada consulta i
+def latencias(funcion, n):
+    tiempos = []
+    for i in range(n):
+        inicio = time.perf_counter()
+        funcion(i)
+        tiempos.append(time.perf_counter() - inicio)
+    return np.percentile(np.array(tiempos) * 1e3, [50, 99])
+
+
+def tamano_directorio(directorio):
+    return sum(os.path.getsize(os.path.join(raiz, f)) for raiz, _, ficheros in os.walk(directorio) for f in ficheros)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de productos similares frente a la fuerza bruta con scipy.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", help="Valores de nprobe a medir (por defecto el del índice)")
+    parser.add_argument("--inserts", type=int, default=10_000, help="Productos añadidos con add()")
+    args = parser.parse_args()
+
+    preprocessor = load_assets()[0]
+    base = pd.read_csv(os.path.join(RAIZ, "datos_productos.csv"))
+    consultas_df = generar_catalogo(base, args.queries, seed=1)
+    consultas = preprocess(consultas_df, preprocessor)
+    tipos = consultas_df["Tipo"].to_numpy()
+    nuevos = generar_catalogo(base, args.inserts, seed=2)
+    X_nuevos = preprocess(nuevos, preprocessor)
+
+    for filas in args.rows:
+        # Por bloques para no tener el millón de descripciones completas en memoria; el índice solo
+        # guarda el principio de cada una (se muestra, los vectores salen del texto completo)
+        bloques, productos = [], []
+        for i, desde in enumerate(range(0, filas, FILAS_POR_BLOQUE)):
+            catalogo = generar_catalogo(base, min(FILAS_POR_BLOQUE, filas - desde), seed=100 + i)
+            bloques.append(preprocess(catalogo, preprocessor))
+            catalogo['Product_Description'] = catalogo['Product_Description'].str[:200]
+            productos.append(catalogo[COLUMNAS_PRODUCTO])
+        X = sp.vstack(bloques, format="csr")
+        catalogo = pd.concat(productos, ignore_index=True)
+        del bloques, productos
+
+        inicio = time.perf_counter()
+        indice = SimilarityIndex.build(X, catalogo, preprocessor)
+        segundos_build = time.perf_counter() - inicio
+        directorio = tempfile.mkdtemp()
+        indice.save(directorio)
+        indice = SimilarityIndex.load(directorio)
+
+        # Fuerza bruta: la misma matriz normalizada completa en memoria
+        V = indice.vectors(X, catalogo["Tipo"])
+        Q = indice.vectors(consultas, tipos)
+
+        def fuerza_bruta(i):
+            puntuaciones = V @ Q[i].toarray().ravel()
+            mejores = np.argpartition(-puntuaciones, args.k - 1)[:args.k]
+            return mejores[np.argsort(-puntuaciones[mejores])]
+
+        # Una consulta cada vez, con el índice vigente (se recarga para las altas)
+        def una(i, **opciones):
+            return indice.search(consultas[i], tipos[i:i + 1], args.k, **opciones)
+
+        exactas = np.array([
+            -np.sort(np.partition(-(V @ q), args.k - 1)[:args.k]) for q in Q.toarray()
+        ])
+
+        print(f"\n{filas:,} productos ({indice.nlist} listas, construcción {segundos_build:.1f} s, "
+              f"{tamano_directorio(directorio) / 2**20:.1f} MB en disco)")
+        p50, p99 = latencias(fuerza_bruta, Q.shape[0])
+        print(f"  {'scipy fuerza bruta':<24} p50 {p50:>8.2f} ms  p99 {p99:>8.2f} ms")
+        p50, p99 = latencias(lambda i: una(i, exact=True), len(tipos))
+        print(f"  {'índice exacto':<24} p50 {p50:>8.2f} ms  p99 {p99:>8.2f} ms")
+        for nprobe in args.nprobe or [indice.nprobe]:
+            p50, p99 = latencias(lambda i: una(i, nprobe=nprobe), len(tipos))
+            _, similitudes = indice.search(consultas, tipos, args.k, nprobe=nprobe)
+            recall = np.mean(similitudes >= exactas[:, [-1]] - 1e-5)
+            print(f"  {f'IVF nprobe={nprobe}':<24} p50 {p50:>8.2f} ms  p99 {p99:>8.2f} ms  recall@{args.k} {recall:.3f}")
+
+        indice = SimilarityIndex.load(directorio, mmap_mode=None)
+        inicio = time.perf_counter()
+        for desde in range(0, args.inserts, 1_000):
+            indice.add(X_nuevos[desde:desde + 1_000], nuevos.iloc[desde:desde + 1_000])
+        segundos_add = time.perf_counter() - inicio
+        p50, p99 = latencias(una, len(tipos))
+        inicio = time.perf_counter()
+        indice.compact()
+        segundos_compact = time.perf_counter() - inicio
+        print(f"  add {args.inserts:,} en lotes de 1.000: {args.inserts / segundos_add:,.0f} productos/s; "
+              f"consulta con cola p50 {p50:.2f} ms; compact {segundos_compact:.2f} s")
+        shutil.rmtree(directorio)
+
+
+if __name__ == "__main__":
+    main()
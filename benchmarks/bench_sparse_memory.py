@@ -0,0 +1,70 @@
+# Benchmark de memoria de la inferencia: camino denso anterior (.toarray() + predict)
+# frente al camino disperso (CSR directo a los bosques). Mide con tracemalloc el pico de
+# memoria asignada durante la predicción para catálogos sintéticos de 10k y 100k filas.
+#
+#   python benchmarks/bench_sparse_memory.py --rows 10000 100000
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from inference import UMBRAL_RESENAS, load_assets, predict_processed, preprocess  # noqa: E402
+
+
+# Camino anterior: densificar toda la matriz y elegir modelo por fila
+def predict_denso(X_processed, reviews, model_bajo, model_alto):
+    X_processed_dense = X_processed.toarray()
+    mascara_bajo = np.asarray(reviews) < UMBRAL_RESENAS
+    predicciones = np.empty(X_processed.shape[0])
+    predicciones[mascara_bajo] = model_bajo.predict(X_processed_dense[mascara_bajo])
+    predicciones[~mascara_bajo] = model_alto.predict(X_processed_dense[~mascara_bajo])
+    return predicciones
+
+
+def medir(funcion, *args):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    segundos = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, pico, segundos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pico de memoria de la inferencia densa frente a la dispersa.")
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos_productos.csv"))
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    preprocessor, model_bajo, model_alto = load_assets()
+    datos = pd.read_csv(args.csv)
+
+    print(f"{'filas':>8} {'denso (MB)':>11} {'disperso (MB)':>14} {'denso (s)':>10} {'disperso (s)':>13}")
+    for filas in args.rows:
+        df = datos.sample(filas, replace=True, random_state=args.seed).reset_index(drop=True)
+        X_processed = preprocess(df, preprocessor)
+
+        denso, pico_denso, t_denso = medir(predict_denso, X_processed, df['Reviews'], model_bajo, model_alto)
+        (disperso, _), pico_disperso, t_disperso = medir(
+            predict_processed, X_processed, df['Reviews'], model_bajo, model_alto
+        )
+        if not np.allclose(denso, disperso):
+            print("❌ Las predicciones densas y dispersas no coinciden")
+            sys.exit(1)
+        print(
+            f"{filas:>8,} {pico_denso / 2**20:>11.1f} {pico_disperso / 2**20:>14.1f} "
+            f"{t_denso:>10.2f} {t_disperso:>13.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Benchmark de arranque en frío: importación + carga de artefactos + primera predicción,
+# medido en un proceso nuevo cada vez. El modo "eager" reproduce las importaciones que
+# App.py hacía al arrancar (shap, matplotlib, seaborn, plotly, wordcloud, reportlab y el
+# corpus de stopwords de NLTK) para comparar con el arranque perezoso actual.
+#
+#   python benchmarks/bench_startup.py --repeat 5
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTACIONES_EAGER = """
+import shap, matplotlib.pyplot, seaborn, plotly.express, wordcloud, reportlab.pdfgen.canvas
+from nltk.corpus import stopwords
+stopwords.words("spanish")
+"""
+
+INICIO = """
+import time
+inicio = time.perf_counter()
+"""
+
+PRIMERA_PREDICCION = """
+import pandas as pd
+from inference import load_assets, predict_batch
+preprocessor, model_bajo, model_alto = load_assets(mmap_mode={mmap_mode!r})
+entrada = pd.DataFrame([{{"Tipo": "champu", "Product_Description": "barba aceite de coco", "Price": 9.5, "Reviews": 25}}])
+predict_batch(entrada, preprocessor, model_bajo, model_alto)
+print(time.perf_counter() - inicio)
+"""
+
+
+def medir(codigo):
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, "-c", codigo], cwd=RAIZ, capture_output=True, text=True, check=True
+    ).stdout
+    return time.perf_counter() - inicio, float(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arranque en frío de la App: importación, carga y primera predicción.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--skip-eager", action="store_true", help="No medir el modo eager (requiere nltk)")
+    args = parser.parse_args()
+
+    modos = {
+        "lazy": INICIO + PRIMERA_PREDICCION.format(mmap_mode=None),
+        "lazy + mmap": INICIO + PRIMERA_PREDICCION.format(mmap_mode="r"),
+    }
+    if not args.skip_eager:
+        modos["eager"] = INICIO + IMPORTACIONES_EAGER + PRIMERA_PREDICCION.format(mmap_mode=None)
+
+    print(f"{'modo':<12} {'proceso (s)':>12} {'import+predicción (s)':>22}")
+    for nombre, codigo in modos.items():
+        medidas = [medir(codigo) for _ in range(args.repeat)]
+        total = statistics.median(m[0] for m in medidas)
+        interna = statistics.median(m[1] for m in medidas)
+        print(f"{nombre:<12} {total:>12.2f} {interna:>22.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Benchmark del barrido what-if (sweep.py) frente a las alternativas: una predicción por variante
+# (lo que hace la App con cada envío del formulario, estimado con una muestra) y predict_batch
+# sobre la rejilla materializada como DataFrame. Comprueba que las predicciones coinciden.
+#
+#   python benchmarks/bench_sweep.py --steps 20 --max-subset 2
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from inference import INGREDIENTES_DOMINIO, load_assets, predict_batch  # noqa: E402
+from sweep import ingredient_subsets, price_grid, sweep  # noqa: E402
+from transformers import CACHE_DOCUMENTOS  # noqa: E402
+
+BASE = {"Tipo": "champu", "Product_Description": "champu natural para barba con aceites esenciales", "Reviews": 25}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido what-if frente a predicciones una a una y predict_batch.")
+    parser.add_argument("--steps", type=int, default=20, help="Puntos de la rejilla de precios")
+    parser.add_argument("--max-subset", type=int, default=2)
+    parser.add_argument("--sample", type=int, default=200, help="Variantes predichas una a una para estimar ese coste")
+    args = parser.parse_args()
+
+    assets = load_assets()
+    tipos = ["champu", "jabon", "exfoliante"]
+    reviews = [25, 90]
+    precios = price_grid(3, 60, args.steps)
+
+    if CACHE_DOCUMENTOS is not None:
+        CACHE_DOCUMENTOS.clear()
+    inicio = time.perf_counter()
+    tabla = sweep(BASE, precios, INGREDIENTES_DOMINIO, tipos, args.max_subset, reviews, assets)
+    segundos_sweep = time.perf_counter() - inicio
+
+    # Rejilla materializada con las mismas variantes y en el mismo orden
+    subconjuntos = ingredient_subsets(INGREDIENTES_DOMINIO, args.max_subset)
+    textos = np.array([" ".join([BASE["Product_Description"], *s]) for s in subconjuntos], dtype=object)
+    rejilla = pd.DataFrame({
+        "Tipo": tabla["Tipo"].astype(str),
+        "Product_Description": textos[tabla["Ingredientes"].cat.codes.to_numpy()],
+        "Price": tabla["Price"],
+        "Reviews": tabla["Reviews"],
+    })
+    if CACHE_DOCUMENTOS is not None:
+        CACHE_DOCUMENTOS.clear()
+    inicio = time.perf_counter()
+    predicciones, _ = predict_batch(rejilla, *assets)
+    segundos_lote = time.perf_counter() - inicio
+
+    muestra = rejilla.sample(min(args.sample, len(rejilla)), random_state=0)
+    inicio = time.perf_counter()
+    for i in range(len(muestra)):
+        predict_batch(muestra.iloc[[i]], *assets)
+    segundos_punto = (time.perf_counter() - inicio) / len(muestra) * len(rejilla)
+
+    n = len(tabla)
+    print(f"{n:,} variantes ({len(tipos)} tipos x {len(subconjuntos)} subconjuntos x {len(precios)} precios x {len(reviews)} reseñas)")
+    print(f"  una a una (estimado)     {segundos_punto:>9.2f} s")
+    print(f"  predict_batch rejilla    {segundos_lote:>9.2f} s  {segundos_punto / segundos_lote:>8.0f}x")
+    print(f"  sweep                    {segundos_sweep:>9.2f} s  {segundos_punto / segundos_sweep:>8.0f}x")
+    print(f"  máx. diferencia con predict_batch: {np.abs(predicciones - tabla['Predicted_Rating'].to_numpy()).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# Benchmark del modo por lotes de CleanText + TokenizerText sobre un catálogo sintético
+# (descripciones de datos_productos.csv remuestreadas). Compara con el camino anterior
+# (listas Python + re.sub por término) y verifica que la salida es idéntica.
+#
+#   python benchmarks/bench_text_batch.py --rows 100000
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(RAIZ))
+sys.path.insert(0, RAIZ)
+
+# Sin caché de textos: las descripciones remuestreadas se repiten y casi todo serían aciertos,
+# que no miden el modo por lotes
+os.environ["TEXT_CACHE_MAX_MB"] = "0"
+
+from bench_clean_text import clean_text_referencia  # noqa: E402
+from transformers import CleanText, TokenizerText  # noqa: E402
+
+
+# Camino anterior: listas intermedias y filtrado de stopwords token a token
+def transform_referencia(textos, stop_words, terminos_compuestos):
+    limpios = [clean_text_referencia(texto) for texto in textos]
+    return [
+        ' '.join([
+            token for token in texto.split()
+            if token not in stop_words or token in terminos_compuestos
+        ])
+        for texto in limpios
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modo por lotes de CleanText + TokenizerText frente al camino anterior.")
+    parser.add_argument("--csv", default=os.path.join(os.path.dirname(RAIZ), "datos_productos.csv"))
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    descripciones = pd.read_csv(args.csv)["Product_Description"]
+    textos = descripciones.sample(args.rows, replace=True, random_state=args.seed).reset_index(drop=True)
+
+    cleaner, tokenizer = CleanText(), TokenizerText()
+
+    inicio = time.perf_counter()
+    referencia = transform_referencia(textos, tokenizer.stop_words, tokenizer.terminos_compuestos)
+    t_antes = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    resultado = tokenizer.transform(cleaner.transform(textos))
+    t_despues = time.perf_counter() - inicio
+
+    if resultado.tolist() != referencia:
+        print("❌ La salida por lotes no coincide con la referencia")
+        sys.exit(1)
+    print(f"✅ Salida idéntica en {args.rows:,} descripciones")
+    print(f"Antes (listas):   {args.rows / t_antes:10,.0f} docs/s  ({t_antes:.2f} s)")
+    print(f"Después (lotes):  {args.rows / t_despues:10,.0f} docs/s  ({t_despues:.2f} s, x{t_antes / t_despues:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Generador de carga local para server.py: abre N conexiones keep-alive concurrentes y
+# envía peticiones POST /predict de una fila con productos de datos_productos.csv. Si no
+# se indica --url, arranca el servicio en el mismo proceso en un puerto libre.
+#
+#   python benchmarks/load_generator.py --requests 2000 --concurrency 32
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from server import CAMPOS, PredictionServer  # noqa: E402
+
+
+async def peticion(reader, writer, metodo, ruta, cuerpo=b""):
+    writer.write(
+        f"{metodo} {ruta} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n\r\n".encode() + cuerpo
+    )
+    await writer.drain()
+    estado = int((await reader.readline()).split()[1])
+    longitud = 0
+    while True:
+        cabecera = await reader.readline()
+        if cabecera in (b"\r\n", b""):
+            break
+        if cabecera.lower().startswith(b"content-length:"):
+            longitud = int(cabecera.split(b":")[1])
+    return estado, await reader.readexactly(longitud)
+
+
+async def cliente(host, puerto, cuerpos, latencias, errores):
+    reader, writer = await asyncio.open_connection(host, puerto)
+    try:
+        for cuerpo in cuerpos:
+            inicio = time.perf_counter()
+            estado, _ = await peticion(reader, writer, "POST", "/predict", cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+            if estado != 200:
+                errores.append(estado)
+    finally:
+        writer.close()
+
+
+async def ejecutar(args):
+    servidor = None
+    host, puerto = "127.0.0.1", None
+    if args.url:
+        host, _, puerto = args.url.replace("http://", "").rstrip("/").partition(":")
+        puerto = int(puerto or 80)
+    else:
+        servidor = PredictionServer(max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+        puerto = await servidor.start(host, 0)
+
+    productos = pd.read_csv(args.csv)[list(CAMPOS)]
+    productos = productos.sample(args.requests, replace=True, random_state=args.seed)
+    cuerpos = [json.dumps(fila, ensure_ascii=False).encode() for fila in productos.to_dict("records")]
+
+    latencias, errores = [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(
+        cliente(host, puerto, cuerpos[i::args.concurrency], latencias, errores)
+        for i in range(args.concurrency)
+    ))
+    segundos = time.perf_counter() - inicio
+
+    reader, writer = await asyncio.open_connection(host, puerto)
+    _, metricas = await peticion(reader, writer, "GET", "/metrics")
+    writer.close()
+    if servidor is not None:
+        await servidor.stop()
+
+    p50, p90, p99 = np.percentile(latencias, [50, 90, 99]) * 1000
+    print(f"{args.requests:,} peticiones, {args.concurrency} conexiones, {len(errores)} errores")
+    print(f"{args.requests / segundos:,.0f} peticiones/s; latencia p50 {p50:.1f} ms, p90 {p90:.1f} ms, p99 {p99:.1f} ms")
+    print("--- /metrics ---")
+    print(metricas.decode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga local para server.py.")
+    parser.add_argument("--url", help="Servicio ya arrancado (p. ej. http://127.0.0.1:8000)")
+    parser.add_argument("--csv", default=os.path.join(RAIZ, "datos_productos.csv"))
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(ejecutar(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+# Suite de benchmark y perfilado del pipeline completo (preprocesado + predicción + SHAP).
+# Genera catálogos sintéticos de 1k a 1M filas remuestreando y perturbando
+# datos_productos.csv, mide cada etapa por separado (throughput, percentiles de latencia
+# por fila y pico de memoria) y guarda los resultados en JSON. Con --compare compara con
+# una ejecución anterior y termina con código 1 si hay regresiones.
+#
+#   python benchmarks/suite.py --sizes 1000 10000 100000 --output benchmarks/results/actual.json
+#   python benchmarks/suite.py --sizes 1000 10000 --compare benchmarks/results/base.json
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from explain import build_explainers, explain_batch  # noqa: E402
+from inference import (  # noqa: E402
+    INGREDIENTES_DOMINIO, PALABRAS_DOMINIO, load_assets, predict_processed, preprocess, reviews_router
+)
+from transformers import CACHE_DOCUMENTOS  # noqa: E402
+
+# Las mismas palabras e ingredientes que ofrecen el formulario de la App y el barrido
+EXTRAS_DOMINIO = PALABRAS_DOMINIO + INGREDIENTES_DOMINIO
+
+
+# Catálogo sintético: filas remuestreadas con precio, reseñas y descripción perturbados
+def generar_catalogo(base, filas, seed=0):
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), filas)].reset_index(drop=True)
+    df['Price'] = (df['Price'] * rng.lognormal(0, 0.15, filas)).round(2)
+    df['Reviews'] = np.maximum(0, df['Reviews'] + rng.integers(-20, 21, filas))
+    cortes = rng.uniform(0.5, 1.0, filas)
+    extras = rng.choice(EXTRAS_DOMINIO, filas)
+    df['Product_Description'] = [
+        f"{texto[:int(len(texto) * corte)]} {extra}" if isinstance(texto, str) else extra
+        for texto, corte, extra in zip(df['Product_Description'], cortes, extras)
+    ]
+    return df
+
+
+# Etapas medidas: cada una lee del contexto lo que produjo la anterior y guarda su salida
+def definir_etapas(preprocessor, model_bajo, model_alto, explainers, filas_shap):
+    pipeline = preprocessor.named_transformers_['descripcion']
+    cleaner, tokenizer, tfidf = (paso for _, paso in pipeline.steps)
+    onehot = preprocessor.named_transformers_['tipo']
+    return [
+        ("CleanText", "limpio", lambda ctx: cleaner.transform(ctx["df"]['Product_Description'])),
+        ("TokenizerText", "tokens", lambda ctx: tokenizer.transform(ctx["limpio"])),
+        ("TF-IDF", None, lambda ctx: tfidf.transform(ctx["tokens"])),
+        ("OneHot", None, lambda ctx: onehot.transform(ctx["df"][['Tipo']])),
+        ("preprocessor", "X", lambda ctx: preprocess(ctx["df"], preprocessor)),
+        ("predict", None, lambda ctx: predict_processed(ctx["X"], ctx["df"]['Reviews'], model_bajo, model_alto)),
+        ("SHAP", None, lambda ctx: explain_batch(
+            ctx["X"][:filas_shap], ctx["df"].iloc[:filas_shap], reviews_router(model_bajo, model_alto), explainers
+        )),
+    ]
+
+
+def ejecutar(etapas, df, medir_memoria=False):
+    ctx = {"df": df}
+    tiempos, picos = {}, {}
+    for nombre, salida, funcion in etapas:
+        # Cada etapa parte de la caché de textos vacía (preprocessor vuelve a limpiar los mismos
+        # textos que las etapas anteriores) para medir siempre el caso sin aciertos
+        if CACHE_DOCUMENTOS is not None:
+            CACHE_DOCUMENTOS.clear()
+        if medir_memoria:
+            tracemalloc.start()
+        inicio = time.perf_counter()
+        resultado = funcion(ctx)
+        tiempos[nombre] = time.perf_counter() - inicio
+        if medir_memoria:
+            picos[nombre] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if salida:
+            ctx[salida] = resultado
+    return tiempos, picos
+
+
+def metadatos():
+    import sklearn
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "cpus": os.cpu_count(),
+    }
+
+
+def benchmark(tamanos, muestras_latencia=200, filas_shap=1_000, memoria=True, seed=0, csv=None):
+    preprocessor, model_bajo, model_alto = load_assets()
+    explainers = build_explainers(reviews_router(model_bajo, model_alto).modelos)
+    base = pd.read_csv(csv or os.path.join(RAIZ, "datos_productos.csv"))
+    etapas = definir_etapas(preprocessor, model_bajo, model_alto, explainers, filas_shap)
+
+    # Latencia por fila: cada etapa sobre filas sueltas del catálogo sintético
+    muestra = generar_catalogo(base, muestras_latencia, seed + 1)
+    latencias = {nombre: [] for nombre, _, _ in etapas}
+    latencias["end_to_end"] = []
+    for i in range(muestras_latencia):
+        tiempos, _ = ejecutar(etapas, muestra.iloc[[i]].reset_index(drop=True))
+        for nombre, segundos in tiempos.items():
+            latencias[nombre].append(segundos)
+        latencias["end_to_end"].append(tiempos["preprocessor"] + tiempos["predict"])
+    percentiles = {
+        nombre: dict(zip(("p50", "p95", "p99"), (np.percentile(valores, [50, 95, 99]) * 1000).round(4).tolist()))
+        for nombre, valores in latencias.items()
+    }
+
+    resultados = []
+    for filas in tamanos:
+        df = generar_catalogo(base, filas, seed)
+        tiempos, _ = ejecutar(etapas, df)
+        picos = ejecutar(etapas, df, medir_memoria=True)[1] if memoria else {}
+        for nombre, segundos in tiempos.items():
+            filas_etapa = min(filas, filas_shap) if nombre == "SHAP" else filas
+            resultados.append({
+                "etapa": nombre,
+                "filas": filas_etapa,
+                "segundos": round(segundos, 6),
+                "filas_por_segundo": round(filas_etapa / segundos, 2) if segundos else None,
+                "latencia_ms": percentiles[nombre],
+                "pico_mb": round(picos[nombre] / 2**20, 3) if nombre in picos else None,
+            })
+        print(f"  {filas:,} filas medidas", file=sys.stderr)
+    resultados.append({"etapa": "end_to_end", "filas": 1, "latencia_ms": percentiles["end_to_end"]})
+    return {"meta": metadatos(), "resultados": resultados}
+
+
+# Regresiones: caída de throughput o subida de p99 por encima del umbral relativo
+def comparar(actual, anterior, umbral=0.10):
+    previos = {(r["etapa"], r["filas"]): r for r in anterior["resultados"]}
+    regresiones = []
+    for r in actual["resultados"]:
+        p = previos.get((r["etapa"], r["filas"]))
+        if p is None:
+            continue
+        if r.get("filas_por_segundo") and p.get("filas_por_segundo"):
+            cambio = r["filas_por_segundo"] / p["filas_por_segundo"] - 1
+            if cambio < -umbral:
+                regresiones.append(f"{r['etapa']} ({r['filas']:,} filas): throughput {cambio:+.1%}")
+        if r["latencia_ms"]["p99"] and p["latencia_ms"]["p99"]:
+            cambio = r["latencia_ms"]["p99"] / p["latencia_ms"]["p99"] - 1
+            if cambio > umbral:
+                regresiones.append(f"{r['etapa']} ({r['filas']:,} filas): latencia p99 {cambio:+.1%}")
+    return regresiones
+
+
+def imprimir(resultados):
+    print(f"{'etapa':<14} {'filas':>10} {'filas/s':>12} {'p50 ms':>9} {'p99 ms':>9} {'pico MB':>9}")
+    for r in resultados["resultados"]:
+        filas_s = f"{r['filas_por_segundo']:,.0f}" if r.get("filas_por_segundo") else "-"
+        pico = f"{r['pico_mb']:.1f}" if r.get("pico_mb") is not None else "-"
+        print(
+            f"{r['etapa']:<14} {r['filas']:>10,} {filas_s:>12} "
+            f"{r['latencia_ms']['p50']:>9.3f} {r['latencia_ms']['p99']:>9.3f} {pico:>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmark y perfilado del pipeline completo.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--shap-rows", type=int, default=1_000, help="Filas máximas explicadas con SHAP")
+    parser.add_argument("--no-memory", action="store_true", help="No medir memoria (evita la pasada con tracemalloc)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join(RAIZ, "benchmarks", "results", "latest.json"))
+    parser.add_argument("--compare", help="Resultados anteriores con los que comparar")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Umbral relativo de regresión (0.10)")
+    args = parser.parse_args()
+
+    resultados = benchmark(args.sizes, args.latency_samples, args.shap_rows, not args.no_memory, args.seed)
+    imprimir(resultados)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2, ensure_ascii=False)
+    print(f"Resultados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regresiones = comparar(resultados, json.load(f), args.threshold)
+        if regresiones:
+            print("❌ Regresiones respecto a " + args.compare)
+            for regresion in regresiones:
+                print("   " + regresion)
+            sys.exit(1)
+        print(f"✅ Sin regresiones respecto a {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
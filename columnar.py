@@ -0,0 +1,192 @@
+# Formato columnar binario para datos_productos.csv (y catálogos con el mismo esquema):
+# un directorio con un .npy por columna que se abre con memoria mapeada, sin parsear CSV.
+#   - Price, Star_Rating: float64; Reviews: int64
+#   - Tipo: codificado por diccionario (códigos int8 + categorías en meta.json)
+#   - Product_Description y, opcionalmente, Tokens (texto ya limpio y tokenizado por el
+#     pipeline): bytes UTF-8 concatenados + desplazamientos int64, como las columnas de
+#     texto de Arrow
+#
+#   python columnar.py datos_productos.csv                   # -> datos_productos.cols/
+#   python columnar.py datos_productos.csv --clean-text      # incluye la columna Tokens
+#
+#   read_dataset("datos_productos.csv")   # usa la copia columnar si está al día, si no el CSV
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+FORMATO = 1
+COLUMNAS_NUMERICAS = {'Price': np.float64, 'Star_Rating': np.float64, 'Reviews': np.int64}
+COLUMNAS_CATEGORICAS = ('Tipo',)
+
+
+def ruta_columnar(ruta_csv):
+    return os.path.splitext(ruta_csv)[0] + ".cols"
+
+
+def _firma(ruta):
+    info = os.stat(ruta)
+    return {"tamano": info.st_size, "mtime_ns": info.st_mtime_ns}
+
+
+# Columna de texto sobre el bloque de bytes mapeado: cada valor se decodifica al acceder
+class TextColumn:
+    def __init__(self, datos, desplazamientos, nulos=None):
+        self._datos = memoryview(datos)
+        self._desplazamientos = desplazamientos
+        self._nulos = nulos
+
+    def __len__(self):
+        return len(self._desplazamientos) - 1
+
+    def __getitem__(self, i):
+        if self._nulos is not None and self._nulos[i]:
+            return np.nan
+        inicio, fin = self._desplazamientos[i], self._desplazamientos[i + 1]
+        return str(self._datos[inicio:fin], "utf-8")
+
+    def __iter__(self):
+        datos = self._datos
+        limites = self._desplazamientos.tolist()
+        textos = (str(datos[inicio:fin], "utf-8") for inicio, fin in zip(limites, limites[1:]))
+        if self._nulos is None:
+            return textos
+        return (np.nan if nulo else texto for texto, nulo in zip(textos, self._nulos))
+
+    def to_numpy(self):
+        return np.fromiter(iter(self), dtype=object, count=len(self))
+
+
+def _guardar_texto(destino, nombre, serie):
+    nulos = serie.isna().to_numpy()
+    codificados = [texto.encode("utf-8") for texto in serie.fillna("").astype(str)]
+    desplazamientos = np.zeros(len(codificados) + 1, dtype=np.int64)
+    np.cumsum(np.fromiter(map(len, codificados), dtype=np.int64, count=len(codificados)), out=desplazamientos[1:])
+    np.save(os.path.join(destino, f"{nombre}.data.npy"), np.frombuffer(b"".join(codificados), dtype=np.uint8))
+    np.save(os.path.join(destino, f"{nombre}.offsets.npy"), desplazamientos)
+    if nulos.any():
+        np.save(os.path.join(destino, f"{nombre}.nulls.npy"), nulos)
+    return {"tipo": "texto", "nulos": bool(nulos.any())}
+
+
+def save_columnar(df, destino, tokens=None, origen=None):
+    os.makedirs(destino, exist_ok=True)
+    columnas = {}
+    for nombre in df.columns:
+        serie = df[nombre]
+        if nombre in COLUMNAS_NUMERICAS:
+            np.save(os.path.join(destino, f"{nombre}.npy"), serie.to_numpy(dtype=COLUMNAS_NUMERICAS[nombre]))
+            columnas[nombre] = {"tipo": np.dtype(COLUMNAS_NUMERICAS[nombre]).name}
+        elif nombre in COLUMNAS_CATEGORICAS:
+            categorias = serie.astype("category")
+            np.save(os.path.join(destino, f"{nombre}.codes.npy"), categorias.cat.codes.to_numpy())
+            columnas[nombre] = {"tipo": "categoria", "categorias": categorias.cat.categories.tolist()}
+        else:
+            columnas[nombre] = _guardar_texto(destino, nombre, serie)
+    if tokens is not None:
+        columnas["Tokens"] = _guardar_texto(destino, "Tokens", pd.Series(tokens, index=df.index))
+
+    meta = {"formato": FORMATO, "filas": len(df), "columnas": columnas, "origen": origen}
+    with open(os.path.join(destino, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=1)
+    return meta
+
+
+def leer_meta(ruta):
+    with open(os.path.join(ruta, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta["formato"] != FORMATO:
+        raise ValueError(f"Formato columnar no soportado: {meta['formato']}")
+    return meta
+
+
+# Carga con proyección de columnas. Las numéricas son arrays mapeados (sin copia; con "c" se
+# pueden modificar en memoria sin tocar el disco); con as_frame=False el texto se devuelve
+# como TextColumn y solo se decodifica lo que se lee.
+def load_columnar(ruta, columns=None, mmap_mode="c", as_frame=True):
+    meta = leer_meta(ruta)
+    nombres = list(meta["columnas"]) if columns is None else list(columns)
+    faltan = [nombre for nombre in nombres if nombre not in meta["columnas"]]
+    if faltan:
+        raise KeyError(f"Columnas no disponibles en {ruta}: {faltan}")
+
+    cargar = lambda fichero: np.load(os.path.join(ruta, fichero), mmap_mode=mmap_mode)  # noqa: E731
+    datos = {}
+    for nombre in nombres:
+        info = meta["columnas"][nombre]
+        if info["tipo"] == "categoria":
+            datos[nombre] = pd.Categorical.from_codes(cargar(f"{nombre}.codes.npy"), info["categorias"])
+        elif info["tipo"] == "texto":
+            nulos = cargar(f"{nombre}.nulls.npy") if info["nulos"] else None
+            texto = TextColumn(cargar(f"{nombre}.data.npy"), cargar(f"{nombre}.offsets.npy"), nulos)
+            datos[nombre] = texto.to_numpy() if as_frame else texto
+        else:
+            datos[nombre] = cargar(f"{nombre}.npy")
+    if not as_frame:
+        return datos
+    return pd.DataFrame(datos, copy=False)
+
+
+# CSV con los mismos tipos que la copia columnar: numéricas según COLUMNAS_NUMERICAS, Tipo
+# categórica y el resto como texto (una descripción numérica no se lee como número)
+def leer_csv(ruta_csv, columns=None):
+    cabecera = pd.read_csv(ruta_csv, nrows=0).columns
+    texto = {
+        nombre: str for nombre in cabecera if nombre not in COLUMNAS_NUMERICAS and nombre not in COLUMNAS_CATEGORICAS
+    }
+    df = pd.read_csv(ruta_csv, usecols=columns, dtype=texto)
+    tipos = {nombre: tipo for nombre, tipo in COLUMNAS_NUMERICAS.items() if nombre in df}
+    tipos.update({nombre: "category" for nombre in COLUMNAS_CATEGORICAS if nombre in df})
+    df = df.astype(tipos)
+    return df if columns is None else df[list(columns)]
+
+
+# Lectura de un CSV con el esquema de datos_productos.csv: si existe una copia columnar
+# generada a partir de este mismo fichero (tamaño y fecha) se lee esa, si no el CSV. Las dos
+# vías devuelven las mismas columnas, en el orden pedido y con los mismos tipos
+def read_dataset(ruta_csv, columns=None):
+    destino = ruta_columnar(ruta_csv)
+    if os.path.exists(os.path.join(destino, "meta.json")):
+        meta = leer_meta(destino)
+        if meta["origen"] == _firma(ruta_csv):
+            if columns is None:
+                columns = [nombre for nombre in meta["columnas"] if nombre != "Tokens"]
+            return load_columnar(destino, columns)
+    return leer_csv(ruta_csv, columns)
+
+
+def convert(ruta_csv, destino=None, clean_text=False):
+    df = leer_csv(ruta_csv)
+    tokens = None
+    if clean_text:
+        from inference import load_assets
+
+        pipeline = load_assets()[0].named_transformers_['descripcion']
+        tokens = df['Product_Description']
+        for _, paso in pipeline.steps[:-1]:
+            tokens = paso.transform(tokens)
+    return save_columnar(df, destino or ruta_columnar(ruta_csv), tokens, _firma(ruta_csv))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convertir un CSV de productos al formato columnar.")
+    parser.add_argument("entrada", help="CSV con el esquema de datos_productos.csv")
+    parser.add_argument("salida", nargs="?", help="Directorio de salida (por defecto <entrada>.cols)")
+    parser.add_argument("--clean-text", action="store_true", help="Guardar también el texto limpio y tokenizado")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    meta = convert(args.entrada, args.salida, args.clean_text)
+    print(
+        f"✅ {meta['filas']:,} filas y {len(meta['columnas'])} columnas en "
+        f"{args.salida or ruta_columnar(args.entrada)} ({time.perf_counter() - inicio:.2f} s)",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Artefactos precalculados para la pestaña de Exploración (EDA): resumen estadístico,
+# frecuencias de palabras para la nube, bins del histograma de ratings y datos de
+# dispersión. Se calculan una vez por versión del dataset (tamaño + fecha de
+# modificación) y se guardan comprimidos en .eda_cache/.
+#
+#   python eda_artifacts.py datos_productos.csv
+import argparse
+import hashlib
+import os
+
+import joblib
+import numpy as np
+
+from columnar import read_dataset
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_CACHE = os.path.join(RAIZ, ".eda_cache")
+COLUMNAS_DISPERSION = ["Price", "Star_Rating", "Reviews", "Tipo"]
+MAX_PALABRAS = 200  # Igual que WordCloud.max_words
+
+
+# Versión del dataset: cambia si cambia el tamaño o la fecha de modificación del fichero
+def dataset_version(ruta):
+    info = os.stat(ruta)
+    clave = f"{os.path.abspath(ruta)}:{info.st_size}:{info.st_mtime_ns}"
+    return hashlib.sha1(clave.encode()).hexdigest()[:12]
+
+
+def build_artifacts(ruta):
+    from wordcloud import WordCloud
+
+    df = read_dataset(ruta)
+
+    # Frecuencias tal y como las calcula WordCloud.generate (mismas stopwords y colocaciones)
+    texto = " ".join(df['Product_Description'].dropna())
+    frecuencias = WordCloud().process_text(texto)
+    frecuencias = dict(sorted(frecuencias.items(), key=lambda item: item[1], reverse=True)[:MAX_PALABRAS])
+
+    conteos, bordes = np.histogram(df['Star_Rating'].dropna(), bins=10)
+
+    dispersion = df[COLUMNAS_DISPERSION].copy()
+    dispersion['Tipo'] = dispersion['Tipo'].astype("category")
+
+    return {
+        "version": dataset_version(ruta),
+        "resumen": df.describe(),
+        "frecuencias": frecuencias,
+        "histograma": {"conteos": conteos, "bordes": bordes},
+        "dispersion": dispersion,
+    }
+
+
+def _ruta_artefactos(version, directorio):
+    return os.path.join(directorio, f"eda_{version}.joblib")
+
+
+# Cargar los artefactos de la versión actual del dataset, calculándolos si no existen
+def load_artifacts(ruta, version=None, directorio=DIRECTORIO_CACHE):
+    version = version or dataset_version(ruta)
+    destino = _ruta_artefactos(version, directorio)
+    if os.path.exists(destino):
+        return joblib.load(destino)
+
+    artefactos = build_artifacts(ruta)
+    os.makedirs(directorio, exist_ok=True)
+    joblib.dump(artefactos, destino, compress=3)
+    return artefactos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precalcular los artefactos de la pestaña EDA.")
+    parser.add_argument("csv", nargs="?", default=os.path.join(RAIZ, "datos_productos.csv"))
+    parser.add_argument("--output-dir", default=DIRECTORIO_CACHE)
+    args = parser.parse_args(argv)
+
+    version = dataset_version(args.csv)
+    artefactos = load_artifacts(args.csv, version, args.output_dir)
+    print(f"✅ Artefactos EDA {artefactos['version']} en {_ruta_artefactos(version, args.output_dir)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Explicaciones SHAP de los bosques: un TreeExplainer por modelo (construido una vez),
+# explicaciones por lotes y volcado masivo de las k contribuciones principales de cada
+# producto a un fichero columnar (.npz).
+#
+#   python explain.py catalogo.csv explicaciones.npz --top-k 5 --max-trees 25
+import argparse
+import copy
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference import feature_names, load_assets, load_router, preprocess
+
+FILAS_POR_BLOQUE_DENSO = 1024  # SHAP no acepta CSR: se densifica por bloques de filas
+
+
+# Copia del bosque con un subconjunto aleatorio de árboles (explicación aproximada)
+def subsample_forest(model, max_trees, random_state=0):
+    if not max_trees or max_trees >= len(model.estimators_):
+        return model
+    indices = np.random.RandomState(random_state).choice(len(model.estimators_), max_trees, replace=False)
+    submodelo = copy.copy(model)
+    submodelo.estimators_ = [model.estimators_[i] for i in np.sort(indices)]
+    submodelo.n_estimators = max_trees
+    return submodelo
+
+
+class ForestExplainer:
+    def __init__(self, model, max_trees=None, random_state=0):
+        import shap
+
+        self.model = subsample_forest(model, max_trees, random_state)
+        self.explainer = shap.TreeExplainer(self.model)
+        self.expected_value = float(np.ravel(self.explainer.expected_value)[0])
+        self._segundos_por_fila = None
+
+    # Valores SHAP de un lote (denso o CSR). Con budget_ms, si la estimación de latencia
+    # del cálculo exacto supera el presupuesto se usa la aproximación de Saabas.
+    def shap_values(self, X, approximate=False, budget_ms=None):
+        n_filas = X.shape[0]
+        if budget_ms is not None and self._segundos_por_fila is not None:
+            approximate = approximate or n_filas * self._segundos_por_fila * 1000 > budget_ms
+
+        inicio = time.perf_counter()
+        valores = np.empty(X.shape, dtype=np.float64)
+        for desde in range(0, n_filas, FILAS_POR_BLOQUE_DENSO):
+            bloque = X[desde:desde + FILAS_POR_BLOQUE_DENSO]
+            bloque = bloque.toarray() if hasattr(bloque, "toarray") else np.asarray(bloque)
+            valores[desde:desde + len(bloque)] = self.explainer.shap_values(
+                bloque, approximate=approximate, check_additivity=False
+            )
+
+        if not approximate and n_filas:
+            segundos = (time.perf_counter() - inicio) / n_filas
+            anterior = self._segundos_por_fila
+            self._segundos_por_fila = segundos if anterior is None else 0.8 * anterior + 0.2 * segundos
+        return valores
+
+
+# Un explicador por modelo del router (mismas claves que router.modelos)
+def build_explainers(modelos, max_trees=None):
+    return {nombre: ForestExplainer(modelo, max_trees) for nombre, modelo in modelos.items()}
+
+
+# Índices y valores de las k contribuciones de mayor magnitud por fila
+def top_k(valores, k):
+    k = min(k, valores.shape[1])
+    indices = np.argpartition(-np.abs(valores), k - 1, axis=1)[:, :k]
+    contribuciones = np.take_along_axis(valores, indices, axis=1)
+    orden = np.argsort(-np.abs(contribuciones), axis=1)
+    return np.take_along_axis(indices, orden, axis=1), np.take_along_axis(contribuciones, orden, axis=1)
+
+
+# Explicar un lote mixto: cada fila con el explicador del modelo al que la envía el router
+def explain_batch(X_processed, entradas, router, explainers, approximate=False, budget_ms=None):
+    codigos = router.route(entradas)
+    valores = np.empty(X_processed.shape, dtype=np.float64)
+    valor_base = np.empty(X_processed.shape[0], dtype=np.float64)
+    for codigo, filas in router.partitions(codigos):
+        explicador = explainers[router.nombres[codigo]]
+        filas = slice(None) if filas is None else filas
+        valores[filas] = explicador.shap_values(X_processed[filas], approximate, budget_ms)
+        valor_base[filas] = explicador.expected_value
+    return valores, valor_base, codigos
+
+
+# Volcado masivo: top-k contribuciones SHAP por producto en un .npz columnar
+# (la columna "modelo" es el índice en "modelos" del modelo que puntuó cada producto)
+def explain_catalogue(entrada, salida, top=5, chunksize=5_000, max_trees=None, approximate=False, assets=None,
+                      router=None):
+    preprocessor, model_bajo, model_alto = assets or load_assets()
+    router = router or load_router(modelos={"modelo_bajo.pkl": model_bajo, "modelo_alto.pkl": model_alto})
+    explainers = build_explainers(router.modelos, max_trees)
+
+    columnas = {"modelo": [], "valor_base": [], "prediccion": [], "features": [], "contribuciones": []}
+    for bloque in pd.read_csv(entrada, chunksize=chunksize):
+        X_processed = preprocess(bloque, preprocessor)
+        valores, valor_base, codigos = explain_batch(X_processed, bloque, router, explainers, approximate)
+        indices, contribuciones = top_k(valores, top)
+        columnas["modelo"].append(codigos.astype(np.int16))
+        columnas["valor_base"].append(valor_base.astype(np.float32))
+        columnas["prediccion"].append((valor_base + valores.sum(axis=1)).astype(np.float32))
+        columnas["features"].append(indices.astype(np.int32))
+        columnas["contribuciones"].append(contribuciones.astype(np.float32))
+
+    columnas = {nombre: np.concatenate(partes) for nombre, partes in columnas.items()}
+    np.savez_compressed(
+        salida, feature_names=feature_names(preprocessor).astype(str), modelos=np.array(router.nombres), **columnas
+    )
+    return len(columnas["prediccion"])
+
+
+# Leer un volcado de explain_catalogue en formato largo (una fila por producto y feature)
+def load_explanations(ruta):
+    with np.load(ruta) as datos:
+        n_filas, k = datos["features"].shape
+        return pd.DataFrame({
+            "fila": np.repeat(np.arange(n_filas), k),
+            "rango": np.tile(np.arange(1, k + 1), n_filas),
+            "feature": datos["feature_names"][datos["features"].ravel()],
+            "contribucion": datos["contribuciones"].ravel(),
+            "valor_base": np.repeat(datos["valor_base"], k),
+            "prediccion": np.repeat(datos["prediccion"], k),
+            "modelo": np.repeat(datos["modelos"][datos["modelo"]], k),
+        })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Volcado de las principales contribuciones SHAP por producto.")
+    parser.add_argument("entrada", help="CSV con el esquema de datos_productos.csv")
+    parser.add_argument("salida", help="Fichero .npz de salida")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--chunksize", type=int, default=5_000)
+    parser.add_argument("--max-trees", type=int, help="Explicar con un subconjunto aleatorio de árboles")
+    parser.add_argument("--approximate", action="store_true", help="Aproximación de Saabas (mucho más rápida)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.entrada):
+        parser.error(f"No existe el fichero de entrada: {args.entrada}")
+
+    inicio = time.perf_counter()
+    filas = explain_catalogue(args.entrada, args.salida, args.top_k, args.chunksize, args.max_trees, args.approximate)
+    segundos = time.perf_counter() - inicio
+    print(f"✅ {filas:,} productos explicados en {segundos:.2f} s ({filas / segundos:,.0f} filas/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# Exportación de los RandomForestRegressor a arrays contiguos de NumPy (feature, umbral,
+# hijos y valor de todos los nodos de todos los árboles) y predictor vectorizado que
+# recorre todos los árboles para todo el lote a la vez, sin despacho por estimador.
+#
+#   python flat_forest.py                # exporta modelo_bajo y modelo_alto a flat_models/
+import argparse
+import os
+
+import joblib
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_FLAT = os.path.join(RAIZ, "flat_models")
+ARRAYS = ("feature", "threshold", "children", "value", "roots")
+FILAS_POR_BLOQUE = 512  # Filas recorridas a la vez (las filas CSR se densifican por bloques)
+
+
+class FlatForest:
+    def __init__(self, feature, threshold, children, value, roots, max_depth=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children  # (n_nodos, 2): hijo izquierdo y derecho
+        self.value = value
+        self.roots = roots
+        self.n_estimators = len(roots)
+
+        # Vistas derivadas para el recorrido (no se guardan)
+        self._feature = np.asarray(feature, dtype=np.intp)
+        self._hijos = np.asarray(children, dtype=np.intp).ravel()
+        self._es_hoja = np.asarray(children[:, 0]) == np.arange(len(children))
+        self._roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = max_depth if max_depth is not None else self._profundidad()
+
+    @classmethod
+    def from_model(cls, model):
+        feature, threshold, children, value, roots = [], [], [], [], []
+        desplazamiento = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            nodos = np.arange(tree.node_count)
+            hoja = tree.children_left == -1
+            # Las hojas apuntan a sí mismas: el recorrido se queda quieto al llegar
+            feature.append(np.where(hoja, 0, tree.feature))
+            threshold.append(np.where(hoja, np.inf, tree.threshold))
+            children.append(np.column_stack([
+                np.where(hoja, nodos, tree.children_left),
+                np.where(hoja, nodos, tree.children_right),
+            ]) + desplazamiento)
+            value.append(tree.value[:, 0, 0])
+            roots.append(desplazamiento)
+            desplazamiento += tree.node_count
+        return cls(
+            np.concatenate(feature).astype(np.int32),
+            np.concatenate(threshold).astype(np.float64),
+            np.concatenate(children).astype(np.int32),
+            np.concatenate(value).astype(np.float64),
+            np.asarray(roots, dtype=np.int32),
+            max(estimator.tree_.max_depth for estimator in model.estimators_),
+        )
+
+    def _profundidad(self):
+        nodos = self._roots
+        profundidad = 0
+        while not self._es_hoja[nodos].all():
+            nodos = np.unique(self._hijos[np.concatenate([2 * nodos, 2 * nodos + 1])])
+            profundidad += 1
+        return profundidad
+
+    def _predict_denso(self, X):
+        # Igual que sklearn: X en float32 comparado con umbrales en float64
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        # También como sklearn: NaN, infinito o fuera del rango de float32 es un error, no una rama
+        if not np.isfinite(X).all():
+            raise ValueError("X contiene NaN, infinito o un valor demasiado grande para float32")
+        posiciones = (np.arange(X.shape[0], dtype=np.intp) * X.shape[1])[:, None]
+        X = X.ravel()
+        nodos = np.broadcast_to(self._roots, (len(posiciones), self.n_estimators))
+        for profundidad in range(self.max_depth):
+            izquierda = np.take(X, posiciones + np.take(self._feature, nodos)) <= np.take(self.threshold, nodos)
+            nodos = np.take(self._hijos, 2 * nodos + ~izquierda)
+            if profundidad % 4 == 3 and np.take(self._es_hoja, nodos).all():
+                break
+        return np.take(self.value, nodos).mean(axis=1)
+
+    def predict(self, X):
+        salida = np.empty(X.shape[0], dtype=np.float64)
+        for desde in range(0, X.shape[0], FILAS_POR_BLOQUE):
+            bloque = X[desde:desde + FILAS_POR_BLOQUE]
+            bloque = bloque.toarray() if hasattr(bloque, "toarray") else bloque
+            salida[desde:desde + bloque.shape[0]] = self._predict_denso(bloque)
+        return salida
+
+    # Un .npy sin comprimir por array: se pueden abrir con mmap_mode y compartir entre procesos
+    def save(self, directorio):
+        os.makedirs(directorio, exist_ok=True)
+        for nombre in ARRAYS:
+            np.save(os.path.join(directorio, f"{nombre}.npy"), getattr(self, nombre))
+
+    @classmethod
+    def load(cls, directorio, mmap_mode="r"):
+        return cls(*(np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode=mmap_mode) for nombre in ARRAYS))
+
+
+# Cargar los bosques aplanados, exportándolos desde los .pkl si todavía no existen
+def load_flat_models(ruta=RAIZ, directorio=DIRECTORIO_FLAT, mmap_mode="r"):
+    modelos = []
+    for nombre in ("modelo_bajo", "modelo_alto"):
+        destino = os.path.join(directorio, nombre)
+        origen = os.path.join(ruta, f"{nombre}.pkl")
+        exportado = os.path.join(destino, "roots.npy")
+        # Se vuelve a exportar si el .pkl es más reciente (p. ej. tras ingest.py --retrain)
+        if not os.path.exists(exportado) or os.path.getmtime(exportado) < os.path.getmtime(origen):
+            FlatForest.from_model(joblib.load(origen)).save(destino)
+        modelos.append(FlatForest.load(destino, mmap_mode))
+    return tuple(modelos)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exportar modelo_bajo/modelo_alto a bosques aplanados.")
+    parser.add_argument("--output-dir", default=DIRECTORIO_FLAT)
+    args = parser.parse_args(argv)
+
+    for nombre in ("modelo_bajo", "modelo_alto"):
+        flat = FlatForest.from_model(joblib.load(os.path.join(RAIZ, f"{nombre}.pkl")))
+        flat.save(os.path.join(args.output_dir, nombre))
+        print(f"✅ {nombre}: {flat.n_estimators} árboles, {len(flat.feature):,} nodos, profundidad {flat.max_depth}")
+
+
+if __name__ == "__main__":
+    main()
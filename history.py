@@ -0,0 +1,246 @@
+# Historial de predicciones de la pestaña Historial en formato columnar: arrays de NumPy que
+# crecen por bloques (rating, precio, reseñas, fecha) y descripciones deduplicadas (códigos +
+# lista de textos únicos). La exportación es por generadores: CSV por bloques de filas y PDF
+# página a página con la maquetación precalculada. Quien los consume decide si une los bloques
+# (la App lo hace: st.download_button necesita el fichero completo) o los escribe según llegan.
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from inference import UMBRAL_RESENAS
+
+COLUMNAS = ["Rating", "Descripción", "Precio", "Reseñas", "Fecha y hora"]
+ETIQUETAS_RESENAS = np.array([f"Menos de {UMBRAL_RESENAS}", f"Más de {UMBRAL_RESENAS}"], dtype=object)
+
+# Maquetación del PDF (puntos, tamaño carta), la misma que tenía generate_pdf en App.py
+ANCHO_PAGINA, ALTO_PAGINA = 612, 792
+X_INICIO = 30
+ANCHOS_COLUMNAS = [70, 200, 60, 70, 100]
+Y_ENCABEZADO = 700
+Y_PRIMERA_FILA = Y_ENCABEZADO - 25
+Y_MINIMO = 50
+CARACTERES_POR_LINEA = 25
+ALTO_FILA = 30
+ALTO_LINEA = 12
+# Una fila nunca ocupa más de una página: las descripciones muy largas se recortan
+MAX_LINEAS_DESCRIPCION = (Y_PRIMERA_FILA - Y_MINIMO) // ALTO_LINEA - 2
+
+
+class PredictionHistory:
+    def __init__(self, capacidad=1024):
+        self._n = 0
+        self._rating = np.empty(capacidad, dtype=np.float64)
+        self._precio = np.empty(capacidad, dtype=np.float64)
+        self._mas_resenas = np.empty(capacidad, dtype=np.int8)
+        self._fecha = np.empty(capacidad, dtype="datetime64[s]")
+        self._descripcion = np.empty(capacidad, dtype=np.int32)
+        self._textos = []
+        self._codigos = {}
+        self._tabla_textos = np.empty(0, dtype=object)
+
+    def __len__(self):
+        return self._n
+
+    def _reservar(self, n):
+        if self._n + n <= len(self._rating):
+            return
+        capacidad = max(2 * len(self._rating), self._n + n)
+        for nombre in ("_rating", "_precio", "_mas_resenas", "_fecha", "_descripcion"):
+            anterior = getattr(self, nombre)
+            nuevo = np.empty(capacidad, dtype=anterior.dtype)
+            nuevo[:self._n] = anterior[:self._n]
+            setattr(self, nombre, nuevo)
+
+    def _codificar(self, textos):
+        codigos = self._codigos
+        for texto in textos:
+            if texto not in codigos:
+                codigos[texto] = len(self._textos)
+                self._textos.append(texto)
+        return [codigos[texto] for texto in textos]
+
+    def append(self, rating, descripcion, precio, reviews, fecha=None):
+        self.extend([rating], [descripcion], [precio], [reviews], None if fecha is None else [fecha])
+
+    # Alta vectorizada (p. ej. un lote puntuado); las descripciones se deduplican con factorize
+    def extend(self, ratings, descripciones, precios, reviews, fechas=None):
+        n = len(ratings)
+        self._reservar(n)
+        codigos, unicos = pd.factorize(pd.Series(descripciones, dtype=object).fillna("N/A"))
+        fin = self._n + n
+        self._rating[self._n:fin] = np.round(np.asarray(ratings, dtype=np.float64), 2)
+        self._precio[self._n:fin] = precios
+        self._mas_resenas[self._n:fin] = np.asarray(reviews) >= UMBRAL_RESENAS
+        if fechas is None:
+            self._fecha[self._n:fin] = np.datetime64(pd.Timestamp.now(), "s")
+        else:
+            self._fecha[self._n:fin] = pd.to_datetime(fechas).to_numpy(dtype="datetime64[s]")
+        self._descripcion[self._n:fin] = np.asarray(self._codificar(list(unicos)), dtype=np.int32)[codigos]
+        self._n = fin
+
+    def clear(self):
+        self.__init__()
+
+    # "AAAA-MM-DDTHH:MM:SS" -> "AAAA-MM-DD HH:MM:SS" sustituyendo el carácter 10 de cada valor
+    def _fechas_texto(self, inicio, fin):
+        fechas = np.datetime_as_string(self._fecha[inicio:fin], unit="s")
+        if len(fechas):
+            fechas.view(np.uint32).reshape(len(fechas), -1)[:, 10] = ord(" ")
+        return fechas
+
+    def _descripciones(self, inicio, fin):
+        if len(self._tabla_textos) != len(self._textos):
+            self._tabla_textos = np.array(self._textos + [None], dtype=object)[:-1]
+        return self._tabla_textos[self._descripcion[inicio:fin]]
+
+    def _columnas(self, inicio, fin):
+        fin = min(fin, self._n)
+        return {
+            "Rating": self._rating[inicio:fin],
+            "Descripción": self._descripciones(inicio, fin),
+            "Precio": self._precio[inicio:fin],
+            "Reseñas": ETIQUETAS_RESENAS[self._mas_resenas[inicio:fin]],
+            "Fecha y hora": self._fechas_texto(inicio, fin).astype(object),
+        }
+
+    def to_frame(self, inicio=0, fin=None):
+        fin = self._n if fin is None else fin
+        return pd.DataFrame(self._columnas(inicio, fin))
+
+    # Texto de cada celda (como str(valor) en el generate_pdf original), por columnas
+    def _celdas(self, inicio, fin):
+        return [columna.astype(str).tolist() for columna in self._columnas(inicio, fin).values()]
+
+    # CSV por bloques de filas (bytes UTF-8), igual que DataFrame.to_csv(index=False)
+    def iter_csv(self, filas_por_bloque=20_000):
+        yield (",".join(COLUMNAS) + "\n").encode("utf-8")
+        for inicio in range(0, self._n, filas_por_bloque):
+            yield self.to_frame(inicio, inicio + filas_por_bloque).to_csv(header=False, index=False).encode("utf-8")
+
+    def iter_pdf(self, titulo="Historial de Predicciones"):
+        return _PdfHistorial(self, titulo).paginas()
+
+
+def _texto_pdf(texto):
+    codificado = texto.encode("cp1252", "replace")
+    return codificado.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)")
+
+
+# Escritor PDF mínimo y secuencial: cabecera, una página (contenido comprimido + objeto página)
+# por iteración y, al final, el árbol de páginas, el catálogo y la tabla xref. Solo usa las
+# fuentes estándar Helvetica y Helvetica-Bold, que no se incrustan.
+class _PdfHistorial:
+    PAGINAS, CATALOGO, FUENTE, FUENTE_NEGRITA = 1, 2, 3, 4
+    FILAS_POR_BLOQUE = 5_000
+
+    def __init__(self, historial, titulo):
+        self.historial = historial
+        self.titulo = titulo
+        self._desplazamientos = {}
+        self._posicion = 0
+        self._siguiente = 5
+        self._paginas = []
+
+    def _objeto(self, numero, cuerpo):
+        self._desplazamientos[numero] = self._posicion
+        datos = b"%d 0 obj\n" % numero + cuerpo + b"\nendobj\n"
+        self._posicion += len(datos)
+        return datos
+
+    def _escribir(self, datos):
+        self._posicion += len(datos)
+        return datos
+
+    # Alto de cada fila según las líneas de su descripción y reparto de filas por página
+    def _maquetar(self):
+        n = len(self.historial)
+        longitudes = np.fromiter(map(len, self.historial._textos), dtype=np.int64, count=len(self.historial._textos))
+        lineas = np.clip(-(-longitudes // CARACTERES_POR_LINEA), 1, MAX_LINEAS_DESCRIPCION)
+        altos = (ALTO_FILA + ALTO_LINEA * (lineas - 1))[self.historial._descripcion[:n]]
+        # Una fila cabe si su última línea queda por encima de Y_MINIMO (con filas de una
+        # línea es el mismo salto de página que antes: y < 50)
+        cortes, y = [0], Y_PRIMERA_FILA
+        for i, alto in enumerate(altos.tolist()):
+            if y - (alto - ALTO_FILA) < Y_MINIMO and y != Y_PRIMERA_FILA:
+                cortes.append(i)
+                y = Y_PRIMERA_FILA
+            y -= alto
+        cortes.append(n)
+        return cortes
+
+    def _encabezado(self, titulo):
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        x_titulo = 300 - stringWidth(titulo, "Helvetica-Bold", 18) / 2
+        partes = [b"BT /F2 18 Tf %.2f 750 Td (%s) Tj ET" % (x_titulo, _texto_pdf(titulo))]
+        x = X_INICIO
+        for columna, ancho in zip(COLUMNAS, ANCHOS_COLUMNAS):
+            partes.append(b"BT /F2 10 Tf %d %d Td (%s) Tj ET" % (x, Y_ENCABEZADO, _texto_pdf(columna)))
+            x += ancho
+        partes.append(b"%d %d m %d %d l S" % (X_INICIO, Y_ENCABEZADO - 10, X_INICIO + sum(ANCHOS_COLUMNAS), Y_ENCABEZADO - 10))
+        return b"\n".join(partes)
+
+    def _contenido(self, encabezado, columnas):
+        partes = [encabezado, b"BT /F1 9 Tf"]
+        lineas_separadoras = []
+        x_columnas = np.cumsum([X_INICIO] + ANCHOS_COLUMNAS[:-1]).tolist()
+        fin_linea = X_INICIO + sum(ANCHOS_COLUMNAS)
+        y = Y_PRIMERA_FILA
+        for rating, descripcion, precio, resenas, fecha in zip(*columnas):
+            trozos = [descripcion[j:j + CARACTERES_POR_LINEA] for j in range(0, len(descripcion), CARACTERES_POR_LINEA)]
+            trozos = trozos[:MAX_LINEAS_DESCRIPCION] or [""]
+            for x, texto in zip(x_columnas, (rating, trozos[0], precio, resenas, fecha)):
+                partes.append(b"1 0 0 1 %d %d Tm (%s) Tj" % (x, y, _texto_pdf(texto)))
+            for k, trozo in enumerate(trozos[1:], 1):
+                partes.append(b"1 0 0 1 %d %d Tm (%s) Tj" % (x_columnas[1], y - k * ALTO_LINEA, _texto_pdf(trozo)))
+            alto = ALTO_FILA + ALTO_LINEA * (len(trozos) - 1)
+            y_linea = y - alto + 15
+            lineas_separadoras.append(b"%d %d m %d %d l" % (X_INICIO, y_linea, fin_linea, y_linea))
+            y -= alto
+        partes.append(b"ET")
+        partes.append(b"\n".join(lineas_separadoras) + b" S")
+        return zlib.compress(b"\n".join(partes), 6)
+
+    def paginas(self):
+        yield self._escribir(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        for numero, fuente in ((self.FUENTE, b"Helvetica"), (self.FUENTE_NEGRITA, b"Helvetica-Bold")):
+            yield self._objeto(numero, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % fuente)
+
+        cortes = self._maquetar()
+        encabezados = (self._encabezado(self.titulo), self._encabezado(self.titulo + " (cont.)"))
+        # El texto de las celdas se prepara por bloques de filas y cada página toma su tramo
+        # (con el historial vacío hay una única página, solo con el encabezado)
+        bloque, fin_bloque = None, 0
+        for pagina, (inicio, fin) in enumerate(zip(cortes, cortes[1:])):
+            if bloque is None or fin > fin_bloque:
+                inicio_bloque, fin_bloque = inicio, max(fin, inicio + self.FILAS_POR_BLOQUE)
+                bloque = self.historial._celdas(inicio_bloque, fin_bloque)
+            filas = slice(inicio - inicio_bloque, fin - inicio_bloque)
+            contenido = self._contenido(encabezados[pagina > 0], [columna[filas] for columna in bloque])
+            numero_contenido, numero_pagina = self._siguiente, self._siguiente + 1
+            self._siguiente += 2
+            self._paginas.append(numero_pagina)
+            yield self._objeto(
+                numero_contenido,
+                b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(contenido) + contenido + b"\nendstream"
+            )
+            yield self._objeto(
+                numero_pagina,
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+                b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> >>"
+                % (self.PAGINAS, ANCHO_PAGINA, ALTO_PAGINA, numero_contenido, self.FUENTE, self.FUENTE_NEGRITA)
+            )
+
+        hijos = b" ".join(b"%d 0 R" % numero for numero in self._paginas)
+        yield self._objeto(self.PAGINAS, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (hijos, len(self._paginas)))
+        yield self._objeto(self.CATALOGO, b"<< /Type /Catalog /Pages %d 0 R >>" % self.PAGINAS)
+
+        inicio_xref = self._posicion
+        total = self._siguiente
+        xref = [b"xref\n0 %d\n" % total, b"0000000000 65535 f \n"]
+        xref += [b"%010d 00000 n \n" % self._desplazamientos[numero] for numero in range(1, total)]
+        yield self._escribir(b"".join(xref))
+        yield self._escribir(
+            b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (total, self.CATALOGO, inicio_xref)
+        )
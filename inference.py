@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import joblib
+import numpy as np
+import scipy.sparse as sp
+
+from router import ModelRouter
+
+# Columnas que espera preprocessor.pkl y umbral de reseñas que separa los dos modelos
+COLUMNAS_ENTRADA = ['Tipo', 'Product_Description', 'Price']
+UMBRAL_RESENAS = 60
+
+# Vocabulario del formulario de predicción (palabras e ingredientes que reconoce el TF-IDF)
+PALABRAS_DOMINIO = [
+    'acne', 'aceites', 'afeitado', 'anticaida', 'aroma', 'barba', 'caida', 'canas', 'cara', 'coloracion', 'corporal', 'crecimiento', 'cuerpo',
+    'delicada', 'ecologico', 'esencial', 'exfoliante', 'facial', 'fortalecer', 'fragancia', 'graso', 'hidrata', 'marina', 'natural', 'organico',
+    'parabenos', 'parfum', 'pelo', 'poros', 'tinte', 'tradicionales', 'vegano'
+]
+INGREDIENTES_DOMINIO = [
+    'aceite de almendras', 'aceite de argan', 'aceite de coco', 'aceite de jojoba', 'aceite de ricino', 'aceite de romero', 'acido-salicilico',
+    'aloe vera', 'antioxidantes', 'arcilla', 'cafe', 'cafeina', 'canela', 'carbon', 'citric', 'curcuma', 'glicerina', 'ginseng', 'jengibre', 'madera',
+    'mango', 'manteca de karite', 'menta', 'minerales', 'sal rosa', 'sandalo', 'vitamina c', 'zinc'
+]
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+ARTEFACTOS = ("preprocessor.pkl", "modelo_bajo.pkl", "modelo_alto.pkl")
+
+# Qué modelo puntúa cada fila (ver router.py). router.json junto a los .pkl la sustituye, p. ej.
+# {"columna": "Tipo", "rutas": {"champu": "modelo_champu.pkl", "jabon": {...}}, "defecto": "jabon"}
+FICHERO_ROUTER = "router.json"
+RUTAS_POR_DEFECTO = {
+    "columna": "Reviews",
+    "umbrales": [UMBRAL_RESENAS],
+    "rutas": {"bajo": "modelo_bajo.pkl", "alto": "modelo_alto.pkl"},
+}
+
+
+# Cargar preprocesador y modelos (sin dependencias de Streamlit). Los .pkl se guardan sin
+# comprimir, así que mmap_mode='r' mapea los arrays de numpy en lugar de copiarlos.
+def load_assets(ruta=RAIZ, mmap_mode=None):
+    preprocessor = joblib.load(os.path.join(ruta, "preprocessor.pkl"), mmap_mode=mmap_mode)
+    model_bajo = joblib.load(os.path.join(ruta, "modelo_bajo.pkl"), mmap_mode=mmap_mode)
+    model_alto = joblib.load(os.path.join(ruta, "modelo_alto.pkl"), mmap_mode=mmap_mode)
+    return preprocessor, model_bajo, model_alto
+
+
+def load_router_config(ruta=RAIZ):
+    fichero = os.path.join(ruta, FICHERO_ROUTER)
+    if not os.path.exists(fichero):
+        return RUTAS_POR_DEFECTO
+    with open(fichero, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _ficheros_router(config):
+    for destino in config["rutas"].values():
+        if isinstance(destino, dict):
+            yield from _ficheros_router(destino)
+        else:
+            yield destino
+
+
+def _construir_router(config, cargar):
+    rutas = {
+        nombre: _construir_router(destino, cargar) if isinstance(destino, dict) else cargar(destino)
+        for nombre, destino in config["rutas"].items()
+    }
+    return ModelRouter(config["columna"], rutas, config.get("umbrales"), config.get("defecto"))
+
+
+# Router de modelos según router.json (o bajo/alto por reseñas). `modelos` (fichero -> modelo)
+# reutiliza modelos ya cargados, p. ej. los de load_assets(); cada .pkl se carga una sola vez
+def load_router(ruta=RAIZ, mmap_mode=None, modelos=None):
+    cargados = dict(modelos or {})
+
+    def cargar(fichero):
+        if fichero not in cargados:
+            cargados[fichero] = joblib.load(os.path.join(ruta, fichero), mmap_mode=mmap_mode)
+        return cargados[fichero]
+
+    return _construir_router(load_router_config(ruta), cargar)
+
+
+# Modelos del router que no están entre `modelos`, una vez cada uno (un mismo .pkl en varias
+# rutas es un único objeto), p. ej. para instrumentarlos además de modelo_bajo/modelo_alto
+def extra_router_models(router, *modelos):
+    vistos = {id(modelo) for modelo in modelos}
+    extra = {}
+    for nombre, modelo in router.modelos.items():
+        if id(modelo) not in vistos:
+            vistos.add(id(modelo))
+            extra[nombre] = modelo
+    return extra
+
+
+# Huella de los artefactos (nombre, tamaño y fecha) para invalidar cachés persistentes
+def assets_version(ruta=RAIZ):
+    huella = hashlib.sha1()
+    ficheros = list(ARTEFACTOS)
+    if os.path.exists(os.path.join(ruta, FICHERO_ROUTER)):
+        ficheros += [FICHERO_ROUTER, *_ficheros_router(load_router_config(ruta))]
+    for nombre in dict.fromkeys(ficheros):
+        info = os.stat(os.path.join(ruta, nombre))
+        huella.update(f"{nombre}:{info.st_size}:{info.st_mtime_ns}".encode())
+    return huella.hexdigest()[:12]
+
+
+# Nombres de las columnas de salida del preprocesador (en el orden de output_indices_)
+def feature_names(preprocessor):
+    n_salida = max(posiciones.stop for posiciones in preprocessor.output_indices_.values())
+    nombres = np.empty(n_salida, dtype=object)
+    for nombre, transformer, columnas in preprocessor.transformers_:
+        posiciones = preprocessor.output_indices_[nombre]
+        if posiciones.stop == posiciones.start:
+            continue
+        if nombre == 'descripcion':
+            salida = transformer.named_steps['tfidf'].get_feature_names_out()
+        elif hasattr(transformer, 'get_feature_names_out'):
+            salida = transformer.get_feature_names_out(columnas)
+        else:
+            salida = columnas
+        nombres[posiciones] = [f"{nombre}__{valor}" for valor in salida]
+    return nombres
+
+
+# Preprocesar un lote y devolverlo siempre como CSR (ColumnTransformer puede devolver
+# un array denso si la densidad supera sparse_threshold)
+def preprocess(df, preprocessor):
+    X_processed = preprocessor.transform(df[COLUMNAS_ENTRADA])
+    return sp.csr_matrix(X_processed) if not sp.isspmatrix_csr(X_processed) else X_processed
+
+
+def reviews_router(model_bajo, model_alto):
+    return ModelRouter("Reviews", {"bajo": model_bajo, "alto": model_alto}, umbrales=[UMBRAL_RESENAS])
+
+
+# Predicción sobre la matriz ya preprocesada con el reparto bajo/alto por reseñas: cada bosque
+# recibe su partición CSR directamente (sin .toarray()) y un lote homogéneo, la matriz entera
+def predict_processed(X_processed, reviews, model_bajo, model_alto):
+    predicciones, codigos = reviews_router(model_bajo, model_alto).predict(X_processed, {"Reviews": reviews})
+    return predicciones, codigos == 0
+
+
+# Predicción de un lote: un único preprocessor.transform y, como mucho, un predict por modelo
+def predict_batch(df, preprocessor, model_bajo, model_alto):
+    X_processed = preprocess(df, preprocessor)
+    return predict_processed(X_processed, df['Reviews'], model_bajo, model_alto)
+
+
+# Predicción de un lote con un router: (predicciones, código de modelo de cada fila en router.nombres)
+def predict_routed(df, preprocessor, router):
+    return router.predict(preprocess(df, preprocessor), df)
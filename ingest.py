@@ -0,0 +1,287 @@
+# Ingesta incremental de los CSV de "Data Sources" y reentrenamiento de preprocessor + modelos.
+# Reproduce la unión de Preprocessing.ipynb (listado + detalles por ASIN, limpieza de precio,
+# reseñas y estrellas, deduplicado por descripción) pero solo relee los ficheros nuevos o
+# modificados y solo limpia/tokeniza las descripciones que no están en la caché de textos.
+#
+#   python ingest.py "Data Sources"                          # actualiza datos_productos.csv
+#   python ingest.py "Data Sources" --retrain --new-trees 20 # y añade 20 árboles a cada bosque
+#   python ingest.py "Data Sources" --retrain --full         # reajuste completo (mismos hiperparámetros)
+#
+# Un par de ficheros es "<nombre>.csv" (listado) + "<nombre> details.csv" (detalles); el Tipo sale
+# de la primera palabra del nombre (champú, jabón, exfoliante).
+import argparse
+import glob
+import hashlib
+import os
+import sys
+import time
+import unicodedata
+from contextlib import contextmanager
+
+import joblib
+import pandas as pd
+from sklearn.base import clone
+
+from inference import RAIZ, UMBRAL_RESENAS, load_assets
+from transformers import CleanText, TokenizerText
+
+TIPOS_FUENTE = {"champu": "champu", "jabon": "jabon", "exfoliante": "exfoliante"}
+COLUMNAS_CATALOGO = ['Price', 'Star_Rating', 'Reviews', 'Product_Description', 'Tipo']
+DIRECTORIO_ESTADO = os.path.join(RAIZ, ".ingest_state")
+
+
+def _sin_tildes(texto):
+    return unicodedata.normalize("NFD", texto).encode("ascii", "ignore").decode().lower()
+
+
+def huella_texto(texto):
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+def huella_fichero(ruta):
+    huella = hashlib.sha1()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            huella.update(bloque)
+    return huella.hexdigest()
+
+
+# Pares (tipo, listado, detalles) en el orden de TIPOS_FUENTE, como en Preprocessing.ipynb
+def emparejar_fuentes(directorio):
+    pares = []
+    for detalles in glob.glob(os.path.join(directorio, "*details*.csv")):
+        listado = detalles.replace(" details", "")
+        if not os.path.exists(listado):
+            raise ValueError(f"Falta el listado de {detalles}: {listado}")
+        prefijo = _sin_tildes(os.path.basename(listado)).split()[0]
+        if prefijo not in TIPOS_FUENTE:
+            raise ValueError(f"No se reconoce el tipo de producto de {listado}")
+        pares.append((TIPOS_FUENTE[prefijo], listado, detalles))
+    orden = list(TIPOS_FUENTE.values())
+    return sorted(pares, key=lambda par: (orden.index(par[0]), par[1]))
+
+
+# Listado + detalles de un tipo de producto con el esquema de datos_productos.csv
+def leer_fuente(tipo, listado, detalles):
+    df1 = pd.read_csv(listado).drop_duplicates(subset=['ASIN'], keep='first')
+    df2 = pd.read_csv(detalles).drop_duplicates(subset=['ASIN'], keep='first')
+    df = pd.merge(df1, df2, on='ASIN', how='left').dropna(subset=["Star_Rating_y", "Price_x"])
+
+    # Mismas conversiones que Transform_data (incluida la extracción de reseñas con r'(\d+)')
+    return pd.DataFrame({
+        'Price': df['Price_x'].str.replace('€', '').str.replace(',', '.').astype(float),
+        'Star_Rating': (
+            df['Star_Rating_y'].str.extract(r'(\d+[,.]?\d*)')[0].str.replace(',', '.').astype(float)
+        ),
+        'Reviews': df['Number_of_Reviews_y'].str.extract(r'(\d+)')[0].astype(int),
+        'Product_Description': (
+            df['Title_x'].fillna('') + ' ' + df['Bullet_Points'].fillna('') + ' '
+            + df['Product_Description'].fillna('')
+        ),
+        'Tipo': tipo,
+    }).drop_duplicates(subset=['Product_Description'], keep='first')
+
+
+def cargar_estado(directorio=DIRECTORIO_ESTADO):
+    ruta = os.path.join(directorio, "estado.joblib")
+    if os.path.exists(ruta):
+        return joblib.load(ruta)
+    return {"ficheros": {}, "tokens": {}}
+
+
+def guardar_estado(estado, directorio=DIRECTORIO_ESTADO):
+    os.makedirs(directorio, exist_ok=True)
+    _guardar(estado, os.path.join(directorio, "estado.joblib"), compress=3)
+
+
+# Se conserva el fin de línea del fichero existente (datos_productos.csv usa CRLF)
+def _fin_de_linea(ruta):
+    if not os.path.exists(ruta):
+        return "\n"
+    with open(ruta, "rb") as f:
+        return "\r\n" if f.readline().endswith(b"\r\n") else "\n"
+
+
+# Escritura atómica: la app y el servicio pueden estar leyendo los ficheros a la vez
+def _guardar(objeto, ruta, **kwargs):
+    temporal = ruta + ".tmp"
+    if isinstance(objeto, pd.DataFrame):
+        objeto.to_csv(temporal, index=False, encoding="utf-8", lineterminator=_fin_de_linea(ruta))
+    else:
+        joblib.dump(objeto, temporal, **kwargs)
+    os.replace(temporal, ruta)
+
+
+def _pasos_texto(preprocessor):
+    pipeline = preprocessor.named_transformers_['descripcion']
+    return pipeline, [
+        i for i, (_, paso) in enumerate(pipeline.steps) if isinstance(paso, (CleanText, TokenizerText))
+    ]
+
+
+# Catálogo actualizado con los pares de ficheros nuevos o modificados (por huella de contenido).
+# Los productos que un par aportó en la ingesta anterior se sustituyen por los de la versión
+# nueva, y un producto que vuelve a aparecer (misma descripción) se queda con los datos más recientes.
+def ingest(directorio, catalogo=None, estado=None):
+    estado = estado if estado is not None else cargar_estado()
+    nuevos, retirados = [], set()
+    for tipo, listado, detalles in emparejar_fuentes(directorio):
+        clave = os.path.basename(listado)
+        firma = huella_fichero(listado) + "|" + huella_fichero(detalles)
+        anterior = estado["ficheros"].get(clave, {})
+        if anterior.get("firma") == firma:
+            continue
+        fuente = leer_fuente(tipo, listado, detalles)
+        nuevos.append(fuente)
+        retirados.update(anterior.get("huellas", ()))
+        estado["ficheros"][clave] = {
+            "firma": firma, "huellas": [huella_texto(texto) for texto in fuente['Product_Description']]
+        }
+    if not nuevos:
+        return catalogo, 0
+
+    delta = pd.concat(nuevos, ignore_index=True).drop_duplicates(subset=['Product_Description'], keep='first')
+    if catalogo is not None:
+        huellas = catalogo['Product_Description'].map(huella_texto)
+        repetidos = catalogo['Product_Description'].isin(delta['Product_Description'])
+        previos = catalogo[~huellas.isin(retirados) & ~repetidos]
+        delta = pd.concat([previos, delta], ignore_index=True)
+    catalogo = delta[COLUMNAS_CATALOGO].reset_index(drop=True)
+    return catalogo.astype({'Price': float, 'Star_Rating': float, 'Reviews': int}), sum(map(len, nuevos))
+
+
+# Descripciones limpias y tokenizadas; solo se procesan los textos que no están en la caché,
+# que se poda a los productos del catálogo actual
+def tokenizar(catalogo, preprocessor, estado):
+    pipeline, indices = _pasos_texto(preprocessor)
+    huellas = [huella_texto(texto) for texto in catalogo['Product_Description']]
+    cache = estado["tokens"]
+    pendientes = {h: texto for h, texto in zip(huellas, catalogo['Product_Description']) if h not in cache}
+    if pendientes:
+        textos = pd.Series(list(pendientes.values()))
+        for i in indices:
+            textos = pipeline.steps[i][1].transform(textos)
+        cache.update(zip(pendientes, textos))
+    estado["tokens"] = {h: cache[h] for h in huellas}
+    return pd.Series([cache[h] for h in huellas], index=catalogo.index), len(pendientes)
+
+
+# Durante el bloque, los pasos CleanText/TokenizerText del pipeline de texto se saltan
+# ("passthrough") para transformar o ajustar directamente con los tokens de la caché
+@contextmanager
+def _con_tokens(preprocessor):
+    pipeline, indices = _pasos_texto(preprocessor)
+    originales = {i: pipeline.steps[i] for i in indices}
+    for i, (nombre, _) in originales.items():
+        pipeline.steps[i] = (nombre, "passthrough")
+    try:
+        yield preprocessor
+    finally:
+        for i, paso in originales.items():
+            pipeline.steps[i] = paso
+
+
+def ajustar_preprocesador(preprocessor, df_tokens):
+    pipeline, indices = _pasos_texto(preprocessor)
+    pasos = {pipeline.steps[i][0]: pipeline.steps[i][1] for i in indices}
+    nuevo = clone(preprocessor).set_params(**{f"descripcion__{nombre}": "passthrough" for nombre in pasos})
+    nuevo.fit(df_tokens)
+    ajustado = nuevo.named_transformers_['descripcion']
+    ajustado.steps = [(nombre, pasos.get(nombre, paso)) for nombre, paso in ajustado.steps]
+    return nuevo
+
+
+def _ampliar_bosque(modelo, X, y, arboles_nuevos, max_arboles, n_jobs):
+    n_jobs_original = modelo.n_jobs
+    modelo.set_params(warm_start=True, n_estimators=len(modelo.estimators_) + arboles_nuevos, n_jobs=n_jobs)
+    modelo.fit(X, y)
+    modelo.set_params(warm_start=False, n_jobs=n_jobs_original)
+    # Ventana deslizante: se descartan los árboles más antiguos
+    if max_arboles and len(modelo.estimators_) > max_arboles:
+        modelo.estimators_ = modelo.estimators_[-max_arboles:]
+        modelo.n_estimators = max_arboles
+    return modelo
+
+
+# Reentrenamiento con el catálogo completo. Por defecto el preprocesador se mantiene (reajustar
+# el idf del TF-IDF cambia la escala de las variables y los árboles existentes dejarían de ser
+# válidos) y a cada bosque se le añaden arboles_nuevos árboles con warm_start. Con completo=True,
+# o si aparece un Tipo nuevo, se reajustan el preprocesador y los bosques desde cero.
+def reentrenar(catalogo, tokens, preprocessor, model_bajo, model_alto, arboles_nuevos=20, completo=False,
+               max_arboles=None, n_jobs=None):
+    df_tokens = catalogo.assign(Product_Description=tokens)
+    tipos = set(preprocessor.named_transformers_['tipo'].categories_[0])
+    completo = completo or not set(catalogo['Tipo']).issubset(tipos)
+
+    if completo:
+        preprocessor = ajustar_preprocesador(preprocessor, df_tokens)
+    with _con_tokens(preprocessor):
+        X = preprocessor.transform(df_tokens)
+    X = X.tocsr() if hasattr(X, "tocsr") else X
+    y = catalogo['Star_Rating'].to_numpy()
+    mascara_bajo = catalogo['Reviews'].to_numpy() < UMBRAL_RESENAS
+
+    modelos = []
+    for modelo, mascara in ((model_bajo, mascara_bajo), (model_alto, ~mascara_bajo)):
+        if completo:
+            nuevo = clone(modelo).set_params(n_jobs=n_jobs).fit(X[mascara], y[mascara])
+            modelos.append(nuevo.set_params(n_jobs=modelo.n_jobs))
+        else:
+            modelos.append(_ampliar_bosque(modelo, X[mascara], y[mascara], arboles_nuevos, max_arboles, n_jobs))
+    return preprocessor, modelos[0], modelos[1], completo
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingesta incremental de Data Sources y reentrenamiento.")
+    parser.add_argument("fuentes", nargs="?", default=os.path.join(RAIZ, "Data Sources"))
+    parser.add_argument("--catalogue", default=os.path.join(RAIZ, "datos_productos.csv"))
+    parser.add_argument("--state-dir", default=DIRECTORIO_ESTADO, help="Ficheros procesados y caché de textos")
+    parser.add_argument("--output-dir", default=RAIZ, help="Destino de preprocessor.pkl y modelo_*.pkl")
+    parser.add_argument("--retrain", action="store_true", help="Reentrenar tras la ingesta")
+    parser.add_argument("--new-trees", type=int, default=20, help="Árboles añadidos a cada bosque (20)")
+    parser.add_argument("--max-trees", type=int, help="Máximo de árboles por bosque (descarta los más antiguos)")
+    parser.add_argument("--full", action="store_true", help="Reajustar preprocesador y bosques desde cero")
+    parser.add_argument("--jobs", type=int, help="Procesos para ajustar los árboles (n_jobs de sklearn)")
+    parser.add_argument("--force", action="store_true", help="Reentrenar aunque no haya datos nuevos")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    estado = cargar_estado(args.state_dir)
+    catalogo = pd.read_csv(args.catalogue) if os.path.exists(args.catalogue) else None
+    catalogo, filas_nuevas = ingest(args.fuentes, catalogo, estado)
+    if catalogo is None:
+        print(f"📭 Nada que ingerir: no existe {args.catalogue} ni hay fuentes nuevas o modificadas", file=sys.stderr)
+        return
+    print(
+        f"📥 {filas_nuevas:,} filas leídas de fuentes nuevas o modificadas, catálogo de {len(catalogo):,} productos",
+        file=sys.stderr
+    )
+
+    preprocessor, model_bajo, model_alto = load_assets()
+    tokens, limpiados = tokenizar(catalogo, preprocessor, estado)
+    print(f"🧹 {limpiados:,} descripciones limpiadas ({len(catalogo) - limpiados:,} desde la caché)", file=sys.stderr)
+
+    if filas_nuevas:
+        _guardar(catalogo, args.catalogue)
+
+    if args.retrain and (filas_nuevas or args.force or args.full):
+        preprocessor, model_bajo, model_alto, completo = reentrenar(
+            catalogo, tokens, preprocessor, model_bajo, model_alto, args.new_trees, args.full, args.max_trees,
+            args.jobs
+        )
+        os.makedirs(args.output_dir, exist_ok=True)
+        for nombre, objeto in (("preprocessor", preprocessor), ("modelo_bajo", model_bajo), ("modelo_alto", model_alto)):
+            _guardar(objeto, os.path.join(args.output_dir, f"{nombre}.pkl"))
+        modo = "reajuste completo" if completo else "warm start"
+        print(
+            f"🌲 Modelos reentrenados ({modo}): bajo {len(model_bajo.estimators_)} árboles, "
+            f"alto {len(model_alto.estimators_)} árboles",
+            file=sys.stderr
+        )
+
+    guardar_estado(estado, args.state_dir)
+    print(f"✅ Terminado en {time.perf_counter() - inicio:.2f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
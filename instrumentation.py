@@ -0,0 +1,187 @@
+# Instrumentación opcional por etapa del pipeline: CleanText, TokenizerText, TF-IDF, los pasos
+# del ColumnTransformer de preprocessor.pkl y el predict de los modelos. Al activarla se envuelve
+# transform/predict de cada objeto con un atributo de instancia que mide llamadas, filas, tiempos
+# y (opcionalmente) bytes asignados; al desactivarla se eliminan esos atributos y los objetos
+# vuelven a usar sus métodos originales, así que desactivada no añade ningún coste.
+#
+#   instrumentacion = Instrumentation()
+#   instrumentacion.enable(preprocessor, model_bajo, model_alto)
+#   ...
+#   instrumentacion.stats()         # dict por etapa
+#   instrumentacion.prometheus()    # texto en formato de Prometheus
+#   instrumentacion.disable()
+#
+# Mientras está activa, los objetos envueltos no se pueden serializar (pickle/joblib) ni enviar
+# a otros procesos: hay que llamar antes a disable().
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+from sklearn.pipeline import Pipeline
+
+CUANTILES = (0.5, 0.9, 0.99)
+
+
+def _filas(X):
+    forma = getattr(X, "shape", None)
+    return forma[0] if forma else len(X)
+
+
+class StageStats:
+    def __init__(self, ventana):
+        self.llamadas = 0
+        self.filas = 0
+        self.segundos = 0.0
+        self.bytes = 0
+        self.latencias = deque(maxlen=ventana)
+
+    def resumen(self):
+        resumen = {
+            "llamadas": self.llamadas,
+            "filas": self.filas,
+            "segundos": self.segundos,
+            "bytes_asignados": self.bytes,
+        }
+        valores = np.quantile(np.fromiter(self.latencias, dtype=np.float64), CUANTILES) if self.latencias \
+            else np.zeros(len(CUANTILES))
+        for cuantil, valor in zip(CUANTILES, valores):
+            resumen[f"p{round(cuantil * 100)}_ms"] = valor * 1000
+        return resumen
+
+
+class Instrumentation:
+    # memoria=True mide con tracemalloc el pico de bytes asignados por llamada (más lento);
+    # ventana es el número de latencias recientes usadas para los percentiles
+    def __init__(self, memoria=False, ventana=10_000):
+        self.memoria = memoria
+        self.ventana = ventana
+        self._etapas = {}
+        self._envueltos = []
+        self._lock = threading.Lock()
+        self._pila = threading.local()
+        self._tracemalloc_propio = False
+
+    @property
+    def enabled(self):
+        return bool(self._envueltos)
+
+    def enable(self, preprocessor=None, model_bajo=None, model_alto=None, **modelos):
+        if self.enabled:
+            raise RuntimeError("La instrumentación ya está activa")
+        if preprocessor is not None:
+            self._envolver(preprocessor, "transform", "preprocessor")
+            for nombre, transformer, _ in preprocessor.transformers_:
+                if transformer in ("drop", "passthrough"):
+                    continue
+                self._envolver(transformer, "transform", nombre)
+                if isinstance(transformer, Pipeline):
+                    for _, paso in transformer.steps:
+                        self._envolver(paso, "transform", f"{nombre}.{type(paso).__name__}")
+        modelos = {"modelo_bajo": model_bajo, "modelo_alto": model_alto, **modelos}
+        for nombre, modelo in modelos.items():
+            if modelo is not None:
+                self._envolver(modelo, "predict", f"{nombre}.predict")
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._tracemalloc_propio = True
+        return self
+
+    def disable(self):
+        for objeto, metodo in self._envueltos:
+            objeto.__dict__.pop(metodo, None)
+        self._envueltos = []
+        if self._tracemalloc_propio:
+            tracemalloc.stop()
+            self._tracemalloc_propio = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.disable()
+
+    def reset(self):
+        with self._lock:
+            self._etapas = {nombre: StageStats(self.ventana) for nombre in self._etapas}
+
+    def _envolver(self, objeto, metodo, etapa):
+        original = getattr(objeto, metodo)
+        self._etapas.setdefault(etapa, StageStats(self.ventana))
+
+        def envoltorio(X, *args, **kwargs):
+            inicio_memoria = self._entrar() if self.memoria else None
+            inicio = time.perf_counter()
+            resultado = original(X, *args, **kwargs)
+            segundos = time.perf_counter() - inicio
+            asignados = self._salir(inicio_memoria) if self.memoria else 0
+            self._registrar(etapa, _filas(X), segundos, asignados)
+            return resultado
+
+        setattr(objeto, metodo, envoltorio)
+        self._envueltos.append((objeto, metodo))
+
+    # Pico de memoria por llamada con etapas anidadas: tracemalloc solo tiene un pico global,
+    # así que antes de reiniciarlo se guarda el pico acumulado en la etapa que lo contiene
+    def _entrar(self):
+        pila = self._pila.__dict__.setdefault("marcos", [])
+        actual, pico = tracemalloc.get_traced_memory()
+        if pila:
+            pila[-1][1] = max(pila[-1][1], pico)
+        tracemalloc.reset_peak()
+        marco = [actual, actual]
+        pila.append(marco)
+        return marco
+
+    def _salir(self, marco):
+        pila = self._pila.marcos
+        pila.pop()
+        pico = max(tracemalloc.get_traced_memory()[1], marco[1])
+        if pila:
+            pila[-1][1] = max(pila[-1][1], pico)
+        return pico - marco[0]
+
+    def _registrar(self, etapa, filas, segundos, asignados):
+        with self._lock:
+            stats = self._etapas[etapa]
+            stats.llamadas += 1
+            stats.filas += filas
+            stats.segundos += segundos
+            stats.bytes += asignados
+            stats.latencias.append(segundos)
+
+    def stats(self):
+        with self._lock:
+            return {nombre: stats.resumen() for nombre, stats in self._etapas.items()}
+
+    def prometheus(self, prefijo="pipeline_stage"):
+        stats = self.stats()
+        lineas = []
+        for metrica, campo, tipo in (
+            ("calls_total", "llamadas", "counter"),
+            ("rows_total", "filas", "counter"),
+            ("seconds_total", "segundos", "counter"),
+            ("allocated_bytes_total", "bytes_asignados", "counter"),
+        ):
+            if campo == "bytes_asignados" and not self.memoria:
+                continue
+            lineas.append(f"# TYPE {prefijo}_{metrica} {tipo}")
+            for etapa, resumen in stats.items():
+                lineas.append(f'{prefijo}_{metrica}{{stage="{etapa}"}} {resumen[campo]}')
+        lineas.append(f"# TYPE {prefijo}_latency_seconds summary")
+        for etapa, resumen in stats.items():
+            for cuantil in CUANTILES:
+                valor = resumen[f"p{round(cuantil * 100)}_ms"] / 1000
+                lineas.append(f'{prefijo}_latency_seconds{{stage="{etapa}",quantile="{cuantil}"}} {valor:.6f}')
+        return "\n".join(lineas) + "\n"
+
+    def tabla(self):
+        lineas = [f"{'etapa':<32} {'llamadas':>9} {'filas':>10} {'total s':>9} {'p50 ms':>9} {'p99 ms':>9} {'MB':>8}"]
+        for etapa, r in self.stats().items():
+            megas = f"{r['bytes_asignados'] / 2**20:.1f}" if self.memoria else "-"
+            lineas.append(
+                f"{etapa:<32} {r['llamadas']:>9,} {r['filas']:>10,} {r['segundos']:>9.3f} "
+                f"{r['p50_ms']:>9.3f} {r['p99_ms']:>9.3f} {megas:>8}"
+            )
+        return "\n".join(lineas)
@@ -0,0 +1,92 @@
+# Motor de inferencia multinúcleo. La limpieza de texto (Python puro, limitada por el GIL)
+# se reparte por bloques de filas entre procesos; la predicción de los bosques se reparte
+# por bloques de filas entre hilos (sklearn libera el GIL al recorrer los árboles). Cada
+# fila se calcula exactamente igual que en serie, así que el resultado es idéntico.
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import scipy.sparse as sp
+
+from inference import COLUMNAS_ENTRADA
+
+_pasos_texto = None
+
+
+def _init_worker(pasos_texto):
+    global _pasos_texto
+    _pasos_texto = pasos_texto
+
+
+def _procesar_texto(textos, pasos_texto=None):
+    for paso in pasos_texto or _pasos_texto:
+        textos = paso.transform(textos)
+    return textos
+
+
+class ParallelInference:
+    # router: qué modelo puntúa cada fila (inference.load_router o reviews_router)
+    def __init__(self, preprocessor, router, n_workers=None, n_threads=None, chunksize=2_000):
+        self.preprocessor = preprocessor
+        self.router = router
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.n_threads = n_threads or self.n_workers
+        self.chunksize = chunksize
+
+        # Pasos de texto del pipeline (todo menos el TF-IDF final), que van a los procesos
+        pipeline = preprocessor.named_transformers_['descripcion']
+        self._pasos_texto = [paso for _, paso in pipeline.steps[:-1]]
+        self._tfidf = pipeline.steps[-1][1]
+
+        self._procesos = None
+        if self.n_workers > 1:
+            self._procesos = ProcessPoolExecutor(
+                max_workers=self.n_workers, initializer=_init_worker, initargs=(self._pasos_texto,)
+            )
+        self._hilos = ThreadPoolExecutor(max_workers=self.n_threads) if self.n_threads > 1 else None
+
+    def _bloques(self, n_filas):
+        return [slice(desde, min(desde + self.chunksize, n_filas)) for desde in range(0, n_filas, self.chunksize)]
+
+    def _texto(self, textos):
+        if self._procesos is None:
+            return _procesar_texto(textos, self._pasos_texto)
+        partes = self._procesos.map(_procesar_texto, [textos[bloque] for bloque in self._bloques(len(textos))])
+        return np.concatenate(list(partes))
+
+    # Equivalente a preprocessor.transform (salida CSR) con la parte de texto en paralelo
+    def transform(self, df):
+        textos = self._texto(df['Product_Description'].to_numpy(dtype=object))
+        columnas = []
+        for nombre, transformer, seleccion in self.preprocessor.transformers_:
+            posiciones = self.preprocessor.output_indices_[nombre]
+            if transformer == 'drop' or posiciones.start == posiciones.stop:
+                continue
+            if nombre == 'descripcion':
+                salida = self._tfidf.transform(textos)
+            else:
+                salida = transformer.transform(df[seleccion])
+            columnas.append(salida if sp.issparse(salida) else sp.csr_matrix(np.asarray(salida, dtype=np.float64)))
+        return sp.hstack(columnas, format="csr")
+
+    def _predict_modelo(self, model, X):
+        if self._hilos is None or X.shape[0] <= self.chunksize:
+            return model.predict(X)
+        partes = self._hilos.map(model.predict, [X[bloque] for bloque in self._bloques(X.shape[0])])
+        return np.concatenate(list(partes))
+
+    # (predicciones, código de modelo de cada fila en router.nombres), como predict_routed
+    def predict(self, df):
+        X_processed = self.transform(df[COLUMNAS_ENTRADA])
+        return self.router.predict(X_processed, df, self._predict_modelo)
+
+    def close(self):
+        for pool in (self._procesos, self._hilos):
+            if pool is not None:
+                pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
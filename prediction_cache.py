@@ -0,0 +1,114 @@
+import json
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+# Clave canónica de una predicción: lo que realmente ve el modelo. La descripción se
+# reduce a la lista ordenada de tokens que genera el propio pipeline (limpieza,
+# stopwords y analizador TF-IDF), así que el orden de las palabras no cambia la clave. El
+# modelo es el que elige el router para esta entrada.
+def clave_prediccion(input_data, preprocessor, router):
+    pipeline = preprocessor.named_transformers_['descripcion']
+    texto = pipeline.named_steps['cleaner'].transform([input_data['Product_Description']])
+    texto = pipeline.named_steps['tokenizer'].transform(texto)[0]
+    tokens = sorted(pipeline.named_steps['tfidf'].build_analyzer()(texto))
+    modelo = router.route_one(input_data)
+    return (str(input_data['Tipo']), tokens, float(input_data['Price']), modelo)
+
+
+# Caché de predicciones compartida entre sesiones: LRU acotada en memoria y, opcionalmente,
+# un almacén SQLite en disco (escritura directa) para conservar resultados entre reinicios
+class PredictionCache:
+    def __init__(self, maxsize=1024, ruta=None, version=""):
+        self.maxsize = maxsize
+        self.ruta = ruta
+        self.version = version
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if ruta:
+            self._db = sqlite3.connect(ruta, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS predicciones (clave TEXT PRIMARY KEY, valor BLOB)")
+            self._db.commit()
+
+    def _serializar(self, clave):
+        return json.dumps([self.version, clave], ensure_ascii=False, separators=(",", ":"))
+
+    def _guardar_en_memoria(self, clave, valor):
+        self._memoria[clave] = valor
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.maxsize:
+            self._memoria.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, clave):
+        clave = self._serializar(clave)
+        with self._lock:
+            if clave in self._memoria:
+                self._memoria.move_to_end(clave)
+                self.hits += 1
+                return self._memoria[clave]
+            if self._db is not None:
+                fila = self._db.execute("SELECT valor FROM predicciones WHERE clave = ?", (clave,)).fetchone()
+                if fila is not None:
+                    valor = pickle.loads(fila[0])
+                    self._guardar_en_memoria(clave, valor)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return valor
+            self.misses += 1
+            return None
+
+    def put(self, clave, valor):
+        clave = self._serializar(clave)
+        with self._lock:
+            self._guardar_en_memoria(clave, valor)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO predicciones (clave, valor) VALUES (?, ?)",
+                    (clave, pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+                )
+                self._db.commit()
+
+    def get_or_compute(self, clave, calcular):
+        valor = self.get(clave)
+        if valor is None:
+            valor = calcular()
+            self.put(clave, valor)
+        return valor
+
+    def clear(self):
+        with self._lock:
+            self._memoria.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM predicciones")
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._memoria),
+                "maxsize": self.maxsize,
+            }
+
+    # Contadores en formato de texto de Prometheus
+    def metrics(self, prefijo="prediction_cache"):
+        stats = self.stats()
+        lineas = []
+        for nombre, tipo in [("hits", "counter"), ("disk_hits", "counter"), ("misses", "counter"),
+                             ("evictions", "counter"), ("size", "gauge"), ("maxsize", "gauge")]:
+            metrica = f"{prefijo}_{nombre}_total" if tipo == "counter" else f"{prefijo}_{nombre}"
+            lineas.append(f"# TYPE {metrica} {tipo}")
+            lineas.append(f"{metrica} {stats[nombre]}")
+        return "\n".join(lineas) + "\n"
@@ -0,0 +1,135 @@
+# Enrutado de un lote entre varios modelos. Un ModelRouter decide con una columna de entrada qué
+# modelo puntúa cada fila: por umbrales numéricos (Reviews < 60 -> bajo, resto -> alto) o por
+# categoría (un modelo por Tipo), y las rutas se pueden anidar (por Tipo y, dentro, por reseñas).
+# predict() calcula la ruta de todas las filas con operaciones sobre arrays, hace un único predict
+# por modelo con sus filas y las devuelve en el orden original. Si todo el lote va al mismo modelo
+# la matriz se le pasa tal cual, y si las filas de un modelo son consecutivas se le pasa una vista
+# (data/indices de la CSR sin copiar). Solo las filas salteadas se copian: una CSR no puede ver
+# un subconjunto disperso de filas sin reunirlas.
+#
+#   router = ModelRouter("Reviews", {"bajo": model_bajo, "alto": model_alto}, umbrales=[60])
+#   router = ModelRouter("Tipo", {"champu": m1, "jabon": m2, "exfoliante": m3})
+#   predicciones, rutas = router.predict(X_processed, df)     # rutas: índices en router.nombres
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+
+class ModelRouter:
+    # rutas: nombre -> estimador (con predict) u otro ModelRouter. Con umbrales, las rutas se
+    # asignan en orden a los intervalos (-inf, u0), [u0, u1), ..., [un, inf); sin umbrales, el
+    # nombre de la ruta es el valor de la columna y `defecto` (nombre de una ruta) recoge los
+    # valores sin ruta propia
+    def __init__(self, columna, rutas, umbrales=None, defecto=None):
+        self.columna = columna
+        self.rutas = dict(rutas)
+        self.umbrales = None if umbrales is None else np.asarray(umbrales, dtype=np.float64)
+        self.defecto = defecto
+        if not self.rutas:
+            raise ValueError("El router necesita al menos una ruta")
+        if self.umbrales is not None:
+            if len(self.rutas) != len(self.umbrales) + 1:
+                raise ValueError(f"Con {len(self.umbrales)} umbrales hacen falta {len(self.umbrales) + 1} rutas")
+            if np.any(np.diff(self.umbrales) <= 0):
+                raise ValueError("Los umbrales deben ser crecientes")
+        if defecto is not None and defecto not in self.rutas:
+            raise ValueError(f"La ruta por defecto {defecto!r} no existe")
+
+        # Modelos finales aplanados: "ruta" o "ruta/subruta"; el código de ruta de cada fila es
+        # su posición en self.nombres. _primer_codigo es el primer código de cada rama.
+        self.modelos = {}
+        self._primer_codigo = np.empty(len(self.rutas), dtype=np.int64)
+        for i, (nombre, destino) in enumerate(self.rutas.items()):
+            self._primer_codigo[i] = len(self.modelos)
+            if isinstance(destino, ModelRouter):
+                self.modelos.update((f"{nombre}/{sub}", modelo) for sub, modelo in destino.modelos.items())
+            else:
+                self.modelos[nombre] = destino
+        self.nombres = list(self.modelos)
+        self._anidado = any(isinstance(destino, ModelRouter) for destino in self.rutas.values())
+
+    @property
+    def columnas(self):
+        columnas = {self.columna}
+        for destino in self.rutas.values():
+            if isinstance(destino, ModelRouter):
+                columnas |= destino.columnas
+        return columnas
+
+    def _ramas(self, valores):
+        if self.umbrales is not None:
+            return np.searchsorted(self.umbrales, np.asarray(valores, dtype=np.float64), side="right")
+        posiciones = {nombre: i for i, nombre in enumerate(self.rutas)}
+        ramas = pd.Series(valores, dtype=object).map(posiciones)
+        sin_ruta = ramas.isna().to_numpy()
+        if sin_ruta.any():
+            if self.defecto is None:
+                valor = pd.Series(valores, dtype=object)[sin_ruta].iloc[0]
+                raise ValueError(f"No hay modelo para {self.columna}={valor!r} (rutas: {list(self.rutas)})")
+            ramas[sin_ruta] = posiciones[self.defecto]
+        return ramas.to_numpy(dtype=np.int64)
+
+    # Código de ruta (índice en self.nombres) de cada fila; entradas es un DataFrame o un dict
+    # de arrays con las columnas de self.columnas
+    def route(self, entradas):
+        ramas = self._ramas(np.asarray(entradas[self.columna]))
+        codigos = self._primer_codigo[ramas]
+        if self._anidado:
+            for i, destino in enumerate(self.rutas.values()):
+                mascara = ramas == i
+                if isinstance(destino, ModelRouter) and mascara.any():
+                    subentradas = {columna: np.asarray(entradas[columna])[mascara] for columna in destino.columnas}
+                    codigos[mascara] += destino.route(subentradas)
+        return codigos
+
+    # Nombre del modelo de una sola entrada (dict con los campos del formulario)
+    def route_one(self, entrada):
+        return self.nombres[self.route({columna: [entrada[columna]] for columna in self.columnas})[0]]
+
+    # Filas de cada modelo presente en el lote: (código, índices de fila o None si son todas)
+    def partitions(self, codigos):
+        if len(codigos) and (codigos == codigos[0]).all():
+            yield int(codigos[0]), None
+            return
+        orden = np.argsort(codigos, kind="stable")
+        ordenados = codigos[orden]
+        limites = np.flatnonzero(np.diff(ordenados)) + 1
+        for filas in np.split(orden, limites):
+            if len(filas):
+                yield int(codigos[filas[0]]), filas
+
+    # Filas de un modelo: vista si son consecutivas (en orden creciente, como las da partitions),
+    # copia solo si están salteadas
+    @staticmethod
+    def select_rows(X_processed, filas):
+        if filas is None:
+            return X_processed
+        desde, hasta = int(filas[0]), int(filas[-1]) + 1
+        if hasta - desde != len(filas):
+            return X_processed[filas]
+        if sp.isspmatrix_csr(X_processed):
+            # Se asignan los arrays en lugar de pasarlos al constructor: su comprobación de formato
+            # copia (prune) las vistas mucho más pequeñas que el array original
+            punteros = X_processed.indptr[desde:hasta + 1]
+            inicio, fin = punteros[0], punteros[-1]
+            vista = sp.csr_matrix((hasta - desde, X_processed.shape[1]), dtype=X_processed.dtype)
+            vista.data = X_processed.data[inicio:fin]
+            vista.indices = X_processed.indices[inicio:fin]
+            vista.indptr = punteros - inicio
+            return vista
+        return X_processed[desde:hasta]
+
+    # Predicción del lote: un predict por modelo presente. predecir(modelo, X) permite cambiar
+    # cómo se llama a cada modelo (p. ej. repartido en hilos)
+    def predict(self, X_processed, entradas, predecir=None):
+        codigos = self.route(entradas)
+        predicciones = np.empty(X_processed.shape[0], dtype=np.float64)
+        for codigo, filas in self.partitions(codigos):
+            modelo = self.modelos[self.nombres[codigo]]
+            X = self.select_rows(X_processed, filas)
+            resultado = modelo.predict(X) if predecir is None else predecir(modelo, X)
+            if filas is None:
+                predicciones[:] = resultado
+            else:
+                predicciones[filas] = resultado
+        return predicciones, codigos
@@ -0,0 +1,207 @@
+# Puntuación masiva del catálogo sin Streamlit: lee un CSV o JSONL con el esquema de
+# datos_productos.csv por bloques, predice cada bloque con preprocessor + el router de modelos
+# (router.json o modelo_bajo/alto por reseñas, como la App) y escribe los resultados de forma
+# incremental (memoria constante).
+#
+#   python score_catalogue.py catalogo.csv predicciones.csv --chunksize 10000
+import argparse
+import os
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from flat_forest import load_flat_models
+from inference import COLUMNAS_ENTRADA, extra_router_models, load_assets, load_router, predict_routed
+from instrumentation import Instrumentation
+from parallel_inference import ParallelInference
+from transformers import CACHE_DOCUMENTOS
+
+COLUMNAS_REQUERIDAS = COLUMNAS_ENTRADA + ['Reviews']
+MAX_FILAS_ERROR = 10  # Números de fila que se muestran por cada motivo de error
+
+
+def _formato(ruta, formato):
+    if formato:
+        return formato
+    return "jsonl" if ruta.lower().endswith((".jsonl", ".json")) else "csv"
+
+
+# Lectura por bloques
+def leer_bloques(ruta, formato, chunksize):
+    if formato == "jsonl":
+        bloques = pd.read_json(ruta, lines=True, chunksize=chunksize, dtype=False)
+        return (_descripcion_texto(bloque) for bloque in bloques)
+    return pd.read_csv(ruta, chunksize=chunksize, dtype={'Product_Description': str})
+
+
+# Descripciones como texto (una descripción numérica no se interpreta como número) y los null
+# como NaN, igual que en un CSV leído con dtype=str
+def _descripcion_texto(bloque):
+    if 'Product_Description' in bloque:
+        descripcion = bloque['Product_Description']
+        bloque['Product_Description'] = descripcion.astype(str).where(descripcion.notna())
+    return bloque
+
+
+# Filas que el preprocesador o el router no pueden puntuar: Tipo desconocido y Price/Reviews que
+# faltan, no son numéricos, no son finitos o son negativos. Los números de fila cuentan desde 1
+# (primera fila de datos) sumando las `desde` filas de los bloques anteriores
+def validar_bloque(bloque, tipos, desde=0):
+    errores = []
+    desconocido = ~bloque['Tipo'].isin(tipos).to_numpy()
+    if desconocido.any():
+        errores.append((f"Tipo desconocido (válidos: {sorted(tipos)})", desconocido))
+    for columna in ('Price', 'Reviews'):
+        valores = pd.to_numeric(bloque[columna], errors='coerce').to_numpy(dtype=np.float64)
+        invalido = ~np.isfinite(valores) | (valores < 0)
+        if invalido.any():
+            errores.append((f"{columna} vacío, no numérico o negativo", invalido))
+        elif bloque[columna].dtype == object:
+            bloque[columna] = valores  # Números como texto (p. ej. "9.5" en un JSONL)
+    if errores:
+        detalle = "; ".join(f"{motivo} en las filas {_numeros_fila(mascara, desde)}" for motivo, mascara in errores)
+        raise ValueError(f"Entrada no válida: {detalle}")
+    return bloque
+
+
+def _numeros_fila(mascara, desde):
+    filas = np.flatnonzero(mascara) + desde + 1
+    texto = ", ".join(map(str, filas[:MAX_FILAS_ERROR]))
+    return texto + f"… ({len(filas):,} en total)" if len(filas) > MAX_FILAS_ERROR else texto
+
+
+# Escritura incremental de un bloque
+def escribir_bloque(bloque, salida, formato, primero):
+    if formato == "jsonl":
+        if len(bloque):
+            bloque.to_json(salida, orient="records", lines=True, force_ascii=False)
+    else:
+        bloque.to_csv(salida, header=primero, index=False)
+
+
+# RSS máximo del proceso en bytes (ru_maxrss está en KB en Linux y en bytes en macOS)
+def pico_rss():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def score_file(entrada, salida, chunksize=10_000, formato_entrada=None, formato_salida=None, assets=None,
+               workers=1, threads=1, shard_size=2_000, router=None):
+    preprocessor, model_bajo, model_alto = assets or load_assets()
+    router = router or load_router(modelos={"modelo_bajo.pkl": model_bajo, "modelo_alto.pkl": model_alto})
+    tipos = set(preprocessor.named_transformers_['tipo'].categories_[0])
+    formato_entrada = _formato(entrada, formato_entrada)
+    formato_salida = _formato(salida, formato_salida)
+
+    # Con varios workers/hilos cada bloque se reparte en sub-bloques de shard_size filas
+    motor = None
+    if workers > 1 or threads > 1:
+        motor = ParallelInference(preprocessor, router, workers, threads, shard_size)
+
+    # Se escribe en un temporal que solo sustituye a `salida` si se puntúa toda la entrada
+    temporal = salida + ".tmp"
+    filas = 0
+    inicio = time.perf_counter()
+    try:
+        with open(temporal, "w", encoding="utf-8", newline="") as f:
+            for i, bloque in enumerate(leer_bloques(entrada, formato_entrada, chunksize)):
+                faltan = [c for c in COLUMNAS_REQUERIDAS if c not in bloque.columns]
+                if faltan:
+                    raise ValueError(f"Faltan columnas en la entrada: {faltan}")
+
+                # Un CSV solo con cabecera da un bloque vacío: se escribe la cabecera sin predecir
+                if len(bloque):
+                    bloque = validar_bloque(bloque, tipos, desde=filas)
+                    if motor is not None:
+                        predicciones, codigos = motor.predict(bloque)
+                    else:
+                        predicciones, codigos = predict_routed(bloque, preprocessor, router)
+                else:
+                    predicciones, codigos = np.empty(0), np.empty(0, dtype=np.int8)
+                bloque = bloque.assign(
+                    Predicted_Rating=predicciones.round(4),
+                    Modelo=pd.Categorical.from_codes(codigos, router.nombres),
+                )
+                escribir_bloque(bloque, f, formato_salida, primero=(i == 0))
+                filas += len(bloque)
+        os.replace(temporal, salida)
+    finally:
+        if motor is not None:
+            motor.close()
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "filas": filas,
+        "segundos": segundos,
+        "filas_por_segundo": filas / segundos if segundos else 0.0,
+        "pico_rss_mb": pico_rss() / 2**20,
+        # Solo refleja la limpieza hecha en este proceso (no la de los workers)
+        "cache_texto": CACHE_DOCUMENTOS.stats() if CACHE_DOCUMENTOS is not None else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Puntuación masiva de productos (CSV/JSONL).")
+    parser.add_argument("entrada", help="Fichero CSV o JSONL con el esquema de datos_productos.csv")
+    parser.add_argument("salida", help="Fichero de salida (.csv o .jsonl)")
+    parser.add_argument("--chunksize", type=int, default=10_000, help="Filas por bloque (10000)")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para la limpieza de texto (1)")
+    parser.add_argument("--threads", type=int, default=1, help="Hilos para la predicción de los bosques (1)")
+    parser.add_argument("--shard-size", type=int, default=2_000, help="Filas por sub-bloque en paralelo (2000)")
+    parser.add_argument("--flat", action="store_true", help="Predecir con los bosques aplanados (flat_forest.py)")
+    parser.add_argument("--input-format", choices=["csv", "jsonl"], help="Por defecto según la extensión")
+    parser.add_argument("--output-format", choices=["csv", "jsonl"], help="Por defecto según la extensión")
+    parser.add_argument(
+        "--instrument", nargs="?", const="time", choices=["time", "memory"],
+        help="Mostrar tiempos por etapa del pipeline al terminar ('memory' mide también bytes asignados)"
+    )
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.entrada):
+        parser.error(f"No existe el fichero de entrada: {args.entrada}")
+    if args.instrument and args.workers > 1:
+        parser.error("--instrument no es compatible con --workers > 1")
+
+    # Con --flat, modelo_bajo/modelo_alto se sustituyen por sus bosques aplanados también dentro
+    # del router; los demás modelos de router.json se cargan tal cual
+    assets = (load_assets()[0],) + load_flat_models() if args.flat else load_assets()
+    router = load_router(modelos={"modelo_bajo.pkl": assets[1], "modelo_alto.pkl": assets[2]})
+
+    instrumentacion = None
+    if args.instrument:
+        instrumentacion = Instrumentation(memoria=args.instrument == "memory").enable(
+            *assets, **extra_router_models(router, *assets[1:])
+        )
+    try:
+        stats = score_file(
+            args.entrada, args.salida, args.chunksize, args.input_format, args.output_format, assets,
+            workers=args.workers, threads=args.threads, shard_size=args.shard_size, router=router
+        )
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if instrumentacion is not None:
+            instrumentacion.disable()
+    print(
+        f"✅ {stats['filas']:,} filas en {stats['segundos']:.2f} s "
+        f"({stats['filas_por_segundo']:,.0f} filas/s), pico RSS {stats['pico_rss_mb']:.1f} MB",
+        file=sys.stderr
+    )
+    cache = stats["cache_texto"]
+    if cache and cache["hits"] + cache["misses"]:
+        print(
+            f"   caché de textos: {cache['hit_rate']:.1%} de aciertos, {cache['size']:,} entradas (limpieza y tokens)",
+            file=sys.stderr
+        )
+    if instrumentacion is not None:
+        print(instrumentacion.tabla(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
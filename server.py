@@ -0,0 +1,318 @@
+# Servicio HTTP de predicción (asyncio, sin dependencias externas) con la misma lógica que
+# App.predict_rating, incluido el router de modelos (router.json). Las peticiones de una fila
+# que llegan a la vez se agrupan en un solo preprocessor.transform + predict dentro de una
+# ventana de tiempo configurable.
+#
+#   python server.py --port 8000 --max-batch 64 --max-wait-ms 5
+#
+#   POST /predict        {"Tipo": ..., "Product_Description": ..., "Price": ..., "Reviews": ...}
+#   POST /predict/batch  [{...}, {...}]
+#   GET  /metrics        métricas en formato de texto de Prometheus
+#   GET  /health
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from http import HTTPStatus
+
+import numpy as np
+import pandas as pd
+
+from inference import extra_router_models, load_assets, load_router, predict_routed
+from instrumentation import Instrumentation
+from transformers import CACHE_DOCUMENTOS
+
+CAMPOS = ("Tipo", "Product_Description", "Price", "Reviews")
+BUCKETS_LOTE = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+CUANTILES = (0.5, 0.9, 0.99)
+
+
+# Validar cada fila antes de encolarla: una fila inválida no debe hacer fallar al resto
+# de peticiones agrupadas en el mismo lote
+def validar_fila(fila, tipos=None):
+    if not isinstance(fila, dict):
+        raise ValueError("Cada producto debe ser un objeto JSON")
+    faltan = [campo for campo in CAMPOS if campo not in fila]
+    if faltan:
+        raise ValueError(f"Faltan campos: {faltan}")
+    if tipos is not None and fila["Tipo"] not in tipos:
+        raise ValueError(f"Tipo desconocido: {fila['Tipo']!r} (válidos: {sorted(tipos)})")
+    try:
+        validada = {
+            "Tipo": str(fila["Tipo"]),
+            "Product_Description": str(fila["Product_Description"]),
+            "Price": float(fila["Price"]),
+            "Reviews": float(fila["Reviews"]),
+        }
+    except (TypeError, ValueError):
+        raise ValueError("Price y Reviews deben ser numéricos")
+    for campo in ("Price", "Reviews"):
+        if not np.isfinite(validada[campo]) or validada[campo] < 0:
+            raise ValueError(f"{campo} debe ser un número finito >= 0: {fila[campo]!r}")
+    return validada
+
+
+# Métricas del servicio: profundidad de cola, histograma de tamaños de lote y latencias
+class ServerMetrics:
+    def __init__(self, ventana=10_000):
+        self.peticiones = 0
+        self.errores = 0
+        self.lotes = 0
+        self.filas = 0
+        self.buckets = dict.fromkeys(BUCKETS_LOTE, 0)
+        self.latencias = deque(maxlen=ventana)
+        self.cola = lambda: 0
+
+    def observar_lote(self, tamano):
+        self.lotes += 1
+        self.filas += tamano
+        for limite in BUCKETS_LOTE:
+            if tamano <= limite:
+                self.buckets[limite] += 1
+
+    def observar_latencia(self, segundos):
+        self.latencias.append(segundos)
+
+    def percentiles(self):
+        if not self.latencias:
+            return dict.fromkeys(CUANTILES, 0.0)
+        valores = np.quantile(np.fromiter(self.latencias, dtype=np.float64), CUANTILES)
+        return dict(zip(CUANTILES, valores))
+
+    def prometheus(self):
+        lineas = [
+            "# TYPE prediction_requests_total counter",
+            f"prediction_requests_total {self.peticiones}",
+            "# TYPE prediction_errors_total counter",
+            f"prediction_errors_total {self.errores}",
+            "# TYPE prediction_queue_depth gauge",
+            f"prediction_queue_depth {self.cola()}",
+            "# TYPE prediction_batch_size histogram",
+        ]
+        for limite in BUCKETS_LOTE:
+            lineas.append(f'prediction_batch_size_bucket{{le="{limite}"}} {self.buckets[limite]}')
+        lineas += [
+            f'prediction_batch_size_bucket{{le="+Inf"}} {self.lotes}',
+            f"prediction_batch_size_sum {self.filas}",
+            f"prediction_batch_size_count {self.lotes}",
+            "# TYPE prediction_latency_seconds summary",
+        ]
+        for cuantil, valor in self.percentiles().items():
+            lineas.append(f'prediction_latency_seconds{{quantile="{cuantil}"}} {valor:.6f}')
+        lineas.append(f"prediction_latency_seconds_count {len(self.latencias)}")
+        return "\n".join(lineas) + "\n"
+
+
+# Agrupador de peticiones: espera como mucho max_wait_ms desde la primera fila de la cola
+# (o hasta max_batch filas) y predice todo el grupo con una sola llamada
+class MicroBatcher:
+    def __init__(self, predecir, max_batch=64, max_wait_ms=5.0, metrics=None):
+        self.predecir = predecir
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics or ServerMetrics()
+        self._cola = asyncio.Queue()
+        self.metrics.cola = self._cola.qsize
+        self._tarea = None
+
+    def start(self):
+        self._tarea = asyncio.get_running_loop().create_task(self._bucle())
+
+    async def stop(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            try:
+                await self._tarea
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, fila):
+        futuro = asyncio.get_running_loop().create_future()
+        await self._cola.put((fila, futuro))
+        return await futuro
+
+    async def _bucle(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._cola.get()]
+            limite = loop.time() + self.max_wait
+            while len(lote) < self.max_batch:
+                restante = limite - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+
+            filas = [fila for fila, _ in lote]
+            self.metrics.observar_lote(len(filas))
+            try:
+                resultados = await loop.run_in_executor(None, self.predecir, filas)
+            except Exception as e:
+                if len(lote) == 1:
+                    _resolver(lote[0][1], excepcion=e)
+                    continue
+                # Si falla el lote se repite fila a fila: el error solo llega a la petición culpable
+                for fila, futuro in lote:
+                    try:
+                        resultado, = await loop.run_in_executor(None, self.predecir, [fila])
+                    except Exception as error:
+                        _resolver(futuro, excepcion=error)
+                    else:
+                        _resolver(futuro, resultado)
+                continue
+            for (_, futuro), resultado in zip(lote, resultados):
+                _resolver(futuro, resultado)
+
+
+# Completar un futuro que el cliente puede haber abandonado (cancelado) entretanto
+def _resolver(futuro, resultado=None, excepcion=None):
+    if futuro.done():
+        return
+    if excepcion is not None:
+        futuro.set_exception(excepcion)
+    else:
+        futuro.set_result(resultado)
+
+
+class PredictionServer:
+    def __init__(self, assets=None, max_batch=64, max_wait_ms=5.0, instrumentation=None, router=None):
+        self.preprocessor, self.model_bajo, self.model_alto = assets or load_assets()
+        self.router = router or load_router(
+            modelos={"modelo_bajo.pkl": self.model_bajo, "modelo_alto.pkl": self.model_alto}
+        )
+        self.instrumentation = instrumentation
+        self.tipos = set(self.preprocessor.named_transformers_['tipo'].categories_[0])
+        self.metrics = ServerMetrics()
+        self.batcher = MicroBatcher(self.predecir, max_batch, max_wait_ms, self.metrics)
+        self._servidor = None
+
+    # Predicción síncrona de una lista de filas validadas (se ejecuta en un hilo)
+    def predecir(self, filas):
+        predicciones, codigos = predict_routed(pd.DataFrame(filas, columns=CAMPOS), self.preprocessor, self.router)
+        return [
+            {"rating": float(rating), "modelo": self.router.nombres[codigo]}
+            for rating, codigo in zip(predicciones, codigos.tolist())
+        ]
+
+    async def start(self, host="127.0.0.1", port=8000):
+        self.batcher.start()
+        self._servidor = await asyncio.start_server(self._atender, host, port)
+        return self._servidor.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._servidor is not None:
+            self._servidor.close()
+            await self._servidor.wait_closed()
+        await self.batcher.stop()
+
+    async def _despachar(self, metodo, ruta, cuerpo):
+        if metodo == "GET" and ruta == "/health":
+            return HTTPStatus.OK, {"status": "ok"}
+        if metodo == "GET" and ruta == "/metrics":
+            texto = self.metrics.prometheus()
+            if CACHE_DOCUMENTOS is not None:
+                texto += CACHE_DOCUMENTOS.metrics()
+            if self.instrumentation is not None:
+                texto += self.instrumentation.prometheus()
+            return HTTPStatus.OK, texto
+        if metodo != "POST" or ruta not in ("/predict", "/predict/batch"):
+            return HTTPStatus.NOT_FOUND, {"error": f"Ruta no encontrada: {metodo} {ruta}"}
+
+        inicio = time.perf_counter()
+        self.metrics.peticiones += 1
+        try:
+            datos = json.loads(cuerpo or b"null")
+            if ruta == "/predict":
+                respuesta = await self.batcher.submit(validar_fila(datos, self.tipos))
+            else:
+                if not isinstance(datos, list) or not datos:
+                    raise ValueError("Se esperaba una lista no vacía de productos")
+                filas = [validar_fila(fila, self.tipos) for fila in datos]
+                self.metrics.observar_lote(len(filas))
+                loop = asyncio.get_running_loop()
+                respuesta = {"predicciones": await loop.run_in_executor(None, self.predecir, filas)}
+        except ValueError as e:
+            self.metrics.errores += 1
+            return HTTPStatus.BAD_REQUEST, {"error": str(e)}
+        except Exception as e:
+            self.metrics.errores += 1
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"Error en la predicción: {e}"}
+        self.metrics.observar_latencia(time.perf_counter() - inicio)
+        return HTTPStatus.OK, respuesta
+
+    # HTTP/1.1 mínimo con keep-alive
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                metodo, ruta, version = linea.decode("latin-1").split()
+                cabeceras = {}
+                while True:
+                    cabecera = await reader.readline()
+                    if cabecera in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = cabecera.decode("latin-1").partition(":")
+                    cabeceras[nombre.strip().lower()] = valor.strip()
+                cuerpo = await reader.readexactly(int(cabeceras.get("content-length") or 0))
+
+                estado, respuesta = await self._despachar(metodo, ruta.split("?")[0], cuerpo)
+                if isinstance(respuesta, str):
+                    tipo, cuerpo = "text/plain; version=0.0.4", respuesta.encode()
+                else:
+                    tipo, cuerpo = "application/json", json.dumps(respuesta, ensure_ascii=False).encode()
+                mantener = version == "HTTP/1.1" and cabeceras.get("connection", "").lower() != "close"
+                writer.write(
+                    f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+                    f"Content-Type: {tipo}\r\nContent-Length: {len(cuerpo)}\r\n"
+                    f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode() + cuerpo
+                )
+                await writer.drain()
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _servir(args):
+    if args.flat:
+        from flat_forest import load_flat_models
+        assets = (load_assets()[0],) + load_flat_models()
+    else:
+        assets = load_assets()
+    router = load_router(modelos={"modelo_bajo.pkl": assets[1], "modelo_alto.pkl": assets[2]})
+    instrumentacion = None
+    if args.instrument:
+        instrumentacion = Instrumentation().enable(*assets, **extra_router_models(router, *assets[1:]))
+    servidor = PredictionServer(assets, args.max_batch, args.max_wait_ms, instrumentacion, router)
+    puerto = await servidor.start(args.host, args.port)
+    print(f"✅ Servicio de predicción en http://{args.host}:{puerto}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await servidor.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servicio HTTP de predicción con micro-batching.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=64, help="Filas máximas por lote agrupado (64)")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Ventana de agrupación en ms (5)")
+    parser.add_argument("--flat", action="store_true", help="Predecir con los bosques aplanados")
+    parser.add_argument("--instrument", action="store_true", help="Publicar tiempos por etapa en /metrics")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_servir(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+# Índice de productos similares: indicador completo de Tipo (una columna por categoría, también la
+# que el one-hot del modelo descarta) + TF-IDF de la descripción de preprocessor.pkl; el precio no
+# cuenta. Los vectores se normalizan (L2), así que la similitud
+# coseno es el producto escalar disperso. Para no recorrer todo el catálogo en cada consulta el
+# índice es un IVF: k-means esférico agrupa los productos en `nlist` listas guardadas de forma
+# contigua y una consulta solo puntúa las `nprobe` listas de centroide más parecido (búsqueda
+# aproximada; exact=True recorre todo). Las altas nuevas van a una cola que se recorre entera
+# hasta que compact() las reparte en sus listas.
+#
+#   python similarity.py                          # construye similarity_index/ desde datos_productos.csv
+#   python similarity.py --add nuevos.csv         # añade productos al índice existente
+#
+#   indice = load_similarity_index()
+#   indice.similar(X_processed, tipos, k=5)       # productos más parecidos con su Star_Rating
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from columnar import load_columnar, read_dataset, save_columnar
+from eda_artifacts import dataset_version
+from inference import RAIZ, assets_version, load_assets, preprocess
+
+FORMATO = 2
+DIRECTORIO_INDICE = os.path.join(RAIZ, "similarity_index")
+RUTA_CATALOGO = os.path.join(RAIZ, "datos_productos.csv")
+COLUMNAS_PRODUCTO = ["Tipo", "Product_Description", "Price", "Star_Rating"]
+ARRAYS = ("data", "indices", "indptr", "centroides", "inicio", "ids")
+MIN_PRODUCTOS_IVF = 10_000  # Por debajo, una sola lista (búsqueda exacta)
+MAX_MUESTRA_KMEANS = 100_000
+FILAS_POR_BLOQUE = 8_192
+MAX_COLA = 50_000  # Altas sin repartir antes de compactar automáticamente
+
+
+# Columnas TF-IDF de la salida del preprocesador y categorías de Tipo. El bloque "tipo" del
+# preprocesador no sirve: su one-hot descarta la primera categoría (champu no tendría dimensión)
+def columnas_similitud(preprocessor):
+    bloque = preprocessor.output_indices_["descripcion"]
+    categorias = preprocessor.named_transformers_["tipo"].categories_[0]
+    return np.arange(bloque.start, bloque.stop), [str(c) for c in categorias]
+
+
+# Una columna por categoría de Tipo (las desconocidas quedan a cero)
+def indicador_tipo(tipos, categorias):
+    codigos = pd.Categorical(np.asarray(tipos, dtype=object), categories=categorias).codes
+    filas = np.flatnonzero(codigos >= 0)
+    return sp.csr_matrix(
+        (np.ones(len(filas), dtype=np.float32), (filas, codigos[filas])), shape=(len(codigos), len(categorias))
+    )
+
+
+# Indicador de Tipo + columnas TF-IDF, normalizadas (L2) en CSR float32
+def normalizar(X_processed, tipos, columnas, categorias):
+    X = sp.hstack([indicador_tipo(tipos, categorias), X_processed[:, columnas]], format="csr", dtype=np.float32)
+    normas = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    normas[normas == 0] = 1
+    X = sp.csr_matrix(sp.diags(1 / normas, format="csr", dtype=np.float32) @ X)
+    X.sort_indices()
+    return X
+
+
+# Similitud de una consulta densa con las filas de los tramos [desde, hasta) de la CSR
+# (data, indices, indptr). Los tramos adyacentes se unen y cada uno es una CSR por cortes (sin
+# copiar los no nulos) que se multiplica por la consulta
+def _puntuar(data, indices, indptr, consulta, desde, hasta):
+    orden = np.argsort(desde)
+    desde, hasta = desde[orden], hasta[orden]
+    cortes = np.flatnonzero(desde[1:] != hasta[:-1]) + 1
+    filas, puntuaciones = [], []
+    for d, h in zip(desde[np.r_[0, cortes]].tolist(), hasta[np.r_[cortes - 1, len(hasta) - 1]].tolist()):
+        if d == h:
+            continue
+        punteros = indptr[d:h + 1]
+        inicio, fin = punteros[0], punteros[-1]
+        tramo = sp.csr_matrix((data[inicio:fin], indices[inicio:fin], punteros - inicio), shape=(h - d, len(consulta)))
+        filas.append(np.arange(d, h))
+        puntuaciones.append(tramo @ consulta)
+    if not filas:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    return np.concatenate(filas), np.concatenate(puntuaciones)
+
+
+def _mejores(claves, puntuaciones, k):
+    if len(puntuaciones) > k:
+        elegidos = np.argpartition(-puntuaciones, k - 1)[:k]
+        claves, puntuaciones = claves[elegidos], puntuaciones[elegidos]
+    orden = np.lexsort((claves, -puntuaciones))
+    return claves[orden], puntuaciones[orden]
+
+
+# k-means esférico (centroides normalizados, asignación por producto escalar)
+def kmeans_esferico(X, nlist, iteraciones=10, seed=0):
+    rng = np.random.default_rng(seed)
+    if X.shape[0] > MAX_MUESTRA_KMEANS:
+        X = X[rng.choice(X.shape[0], MAX_MUESTRA_KMEANS, replace=False)]
+    X = X.toarray()
+    centroides = X[rng.choice(len(X), nlist, replace=False)]
+    for _ in range(iteraciones):
+        asignacion = np.argmax(X @ centroides.T, axis=1)
+        sumas = np.zeros_like(centroides)
+        np.add.at(sumas, asignacion, X)
+        normas = np.linalg.norm(sumas, axis=1)
+        vacios = normas == 0
+        sumas[vacios] = X[rng.choice(len(X), vacios.sum(), replace=False)]
+        normas[vacios] = 1
+        centroides = (sumas / normas[:, None]).astype(np.float32)
+    return centroides
+
+
+def asignar(X, centroides):
+    asignacion = np.empty(X.shape[0], dtype=np.int32)
+    for desde in range(0, X.shape[0], FILAS_POR_BLOQUE):
+        bloque = X[desde:desde + FILAS_POR_BLOQUE].toarray()
+        asignacion[desde:desde + len(bloque)] = np.argmax(bloque @ centroides.T, axis=1)
+    return asignacion
+
+
+class SimilarityIndex:
+    # Vectores ordenados por lista (data/indices/indptr de una CSR), `inicio` con el primer producto
+    # de cada lista (nlist + 1) e `ids` con la posición de cada fila en `productos` (orden de alta)
+    def __init__(self, columnas, categorias, centroides, data, indices, indptr, inicio, ids, productos, nprobe=None,
+                 meta=None):
+        self.columnas = np.asarray(columnas)
+        self.categorias = list(categorias)
+        self.centroides = centroides
+        self.data, self.indices, self.indptr = data, indices, indptr
+        self.inicio = inicio
+        self.ids = ids
+        self.productos = productos
+        self.nlist = len(centroides)
+        self.nprobe = nprobe or max(1, min(self.nlist, round(self.nlist ** 0.5 / 2)))
+        self.meta = meta or {}
+        self._cola = []
+
+    @classmethod
+    def build(cls, X_processed, productos, preprocessor, nlist=None, seed=0):
+        columnas, categorias = columnas_similitud(preprocessor)
+        X = normalizar(X_processed, productos["Tipo"], columnas, categorias)
+        n = X.shape[0]
+        if nlist is None:
+            nlist = 1 if n < MIN_PRODUCTOS_IVF else int(min(4096, round(n ** 0.5)))
+        if nlist == 1:
+            centroides = np.zeros((1, X.shape[1]), dtype=np.float32)
+            asignacion = np.zeros(n, dtype=np.int32)
+        else:
+            centroides = kmeans_esferico(X, nlist, seed=seed)
+            asignacion = asignar(X, centroides)
+        indice = cls(columnas, categorias, centroides, np.empty(0, np.float32), np.empty(0, np.int32),
+                     np.zeros(1, np.int32), np.zeros(nlist + 1, np.int64), np.empty(0, np.int64),
+                     productos.reset_index(drop=True))
+        indice._ordenar(X, asignacion, np.arange(n, dtype=np.int64))
+        return indice
+
+    def __len__(self):
+        return len(self.ids) + sum(X.shape[0] for X, _ in self._cola)
+
+    def _ordenar(self, X, asignacion, ids):
+        orden = np.argsort(asignacion, kind="stable")
+        X = X[orden]
+        # indices e indptr con el mismo tipo entero, para que los tramos de _puntuar no se copien
+        tipo = np.int32 if X.nnz < np.iinfo(np.int32).max else np.int64
+        self.data = X.data.astype(np.float32)
+        self.indices = X.indices.astype(tipo)
+        self.indptr = X.indptr.astype(tipo)
+        self.ids = ids[orden]
+        self.inicio = np.concatenate([[0], np.cumsum(np.bincount(asignacion, minlength=self.nlist))]).astype(np.int64)
+
+    # Alta de productos (filas de preprocess() y sus columnas de COLUMNAS_PRODUCTO); quedan en la
+    # cola, que se recorre entera en cada consulta, hasta la siguiente compactación
+    def add(self, X_processed, productos):
+        X = self.vectors(X_processed, productos["Tipo"])
+        inicio = len(self.productos)
+        self.productos = pd.concat([self.productos, productos[COLUMNAS_PRODUCTO]], ignore_index=True)
+        self._cola.append((X, np.arange(inicio, inicio + X.shape[0], dtype=np.int64)))
+        if sum(X.shape[0] for X, _ in self._cola) > MAX_COLA:
+            self.compact()
+
+    # Reparte la cola en sus listas (más cercana por centroide, sin reentrenar el k-means)
+    def compact(self):
+        if not self._cola:
+            return
+        actual = sp.csr_matrix((self.data, self.indices, self.indptr), shape=(len(self.ids), self.centroides.shape[1]))
+        X = sp.vstack([actual] + [X for X, _ in self._cola], format="csr")
+        ids = np.concatenate([self.ids] + [ids for _, ids in self._cola])
+        lista_actual = np.repeat(np.arange(self.nlist, dtype=np.int32), np.diff(self.inicio))
+        lista_nuevos = asignar(X[len(self.ids):], self.centroides) if self.nlist > 1 \
+            else np.zeros(X.shape[0] - len(self.ids), dtype=np.int32)
+        self._cola = []
+        self._ordenar(X, np.concatenate([lista_actual, lista_nuevos]), ids)
+
+    def vectors(self, X_processed, tipos):
+        return normalizar(X_processed, tipos, self.columnas, self.categorias)
+
+    # k vecinos de cada fila de preprocess() con su Tipo: (posiciones en `productos`, similitudes),
+    # ambas (n_consultas, k). Los productos sin nada en común (similitud 0) no cuentan como
+    # vecinos: si hay menos de k se rellena con -1 / nan
+    def search(self, X_processed, tipos, k=5, nprobe=None, exact=False):
+        consultas = self.vectors(X_processed, tipos).toarray()
+        nprobe = self.nlist if exact else min(self.nlist, nprobe or self.nprobe)
+        posiciones = np.full((len(consultas), k), -1, dtype=np.int64)
+        similitudes = np.full((len(consultas), k), np.nan)
+        for i, consulta in enumerate(consultas):
+            if nprobe == self.nlist:
+                listas = np.arange(self.nlist)
+            else:
+                listas = np.argpartition(-(self.centroides @ consulta), nprobe - 1)[:nprobe]
+            filas, puntuaciones = _puntuar(
+                self.data, self.indices, self.indptr, consulta, self.inicio[listas], self.inicio[listas + 1]
+            )
+            claves = [self.ids[filas]]
+            valores = [puntuaciones]
+            for X, ids in self._cola:
+                claves.append(ids)
+                valores.append(X @ consulta)
+            claves, valores = _mejores(np.concatenate(claves), np.concatenate(valores), k)
+            claves, valores = claves[valores > 0], valores[valores > 0]
+            posiciones[i, :len(claves)] = claves
+            similitudes[i, :len(claves)] = valores
+        return posiciones, similitudes
+
+    # Productos más parecidos en formato largo: una fila por vecino con sus datos y la similitud
+    def similar(self, X_processed, tipos, k=5, nprobe=None, exact=False):
+        posiciones, similitudes = self.search(X_processed, tipos, k, nprobe, exact)
+        validos = posiciones >= 0
+        resultado = self.productos.iloc[posiciones[validos]].reset_index(drop=True)
+        resultado.insert(0, "consulta", np.nonzero(validos)[0])
+        resultado["Similitud"] = similitudes[validos]
+        return resultado
+
+    # Un .npy por array (se abren con mmap_mode) y los productos en formato columnar
+    def save(self, directorio=DIRECTORIO_INDICE):
+        self.compact()
+        os.makedirs(directorio, exist_ok=True)
+        for nombre in ARRAYS:
+            np.save(os.path.join(directorio, f"{nombre}.npy"), getattr(self, nombre))
+        np.save(os.path.join(directorio, "columnas.npy"), self.columnas)
+        save_columnar(self.productos, os.path.join(directorio, "productos"))
+        meta = {**self.meta, "formato": FORMATO, "nprobe": self.nprobe, "productos": len(self.ids),
+                "categorias": self.categorias}
+        with open(os.path.join(directorio, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=1)
+
+    @classmethod
+    def load(cls, directorio=DIRECTORIO_INDICE, mmap_mode="r"):
+        with open(os.path.join(directorio, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["formato"] != FORMATO:
+            raise ValueError(f"Formato de índice no soportado: {meta['formato']}")
+        arrays = {nombre: np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode=mmap_mode) for nombre in ARRAYS}
+        columnas = np.load(os.path.join(directorio, "columnas.npy"))
+        productos = load_columnar(os.path.join(directorio, "productos"))
+        return cls(columnas, meta["categorias"], productos=productos, nprobe=meta["nprobe"], meta=meta, **arrays)
+
+
+def build_similarity_index(ruta_catalogo=RUTA_CATALOGO, assets=None, nlist=None):
+    preprocessor = (assets or load_assets())[0]
+    catalogo = read_dataset(ruta_catalogo)
+    indice = SimilarityIndex.build(preprocess(catalogo, preprocessor), catalogo[COLUMNAS_PRODUCTO], preprocessor, nlist)
+    indice.meta = {"catalogo": dataset_version(ruta_catalogo), "assets": assets_version()}
+    return indice
+
+
+# Índice guardado junto a los modelos; se reconstruye si cambió el catálogo, el preprocesador o el
+# formato del índice
+def load_similarity_index(ruta_catalogo=RUTA_CATALOGO, directorio=DIRECTORIO_INDICE, assets=None, mmap_mode="r"):
+    meta = os.path.join(directorio, "meta.json")
+    if os.path.exists(meta):
+        with open(meta, encoding="utf-8") as f:
+            guardado = json.load(f)
+        if guardado.get("formato") == FORMATO and guardado.get("catalogo") == dataset_version(ruta_catalogo) \
+                and guardado.get("assets") == assets_version():
+            return SimilarityIndex.load(directorio, mmap_mode)
+    indice = build_similarity_index(ruta_catalogo, assets)
+    indice.save(directorio)
+    return SimilarityIndex.load(directorio, mmap_mode)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Construir o ampliar el índice de productos similares.")
+    parser.add_argument("--catalogue", default=RUTA_CATALOGO, help="Catálogo con el esquema de datos_productos.csv")
+    parser.add_argument("--output-dir", default=DIRECTORIO_INDICE)
+    parser.add_argument("--nlist", type=int, help="Número de listas del IVF (por defecto ~sqrt(n); 1 = exacto)")
+    parser.add_argument("--add", metavar="CSV", help="Añadir los productos de este CSV al índice existente")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    if args.add:
+        preprocessor = load_assets()[0]
+        indice = SimilarityIndex.load(args.output_dir, mmap_mode=None)
+        nuevos = pd.read_csv(args.add)
+        indice.add(preprocess(nuevos, preprocessor), nuevos)
+    else:
+        indice = build_similarity_index(args.catalogue, nlist=args.nlist)
+    indice.save(args.output_dir)
+    print(
+        f"✅ {len(indice):,} productos en {indice.nlist:,} listas ({args.output_dir}, "
+        f"{time.perf_counter() - inicio:.2f} s)",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# Barrido "what-if" de precio, ingredientes y Tipo sobre un producto base. En lugar de una
+# predicción por variante, cada columna de entrada del preprocesador se transforma una sola vez
+# por valor distinto (un texto por subconjunto de ingredientes, una fila one-hot por Tipo, un
+# log1p por precio) y la matriz de la rejilla se compone reutilizando esas filas dispersas. Todas
+# las variantes se predicen con un único predict por modelo del router.
+#
+#   python sweep.py --tipo champu --description "barba natural" --price 9.5 --reviews 25 \
+#       --price-range 5 40 --steps 8 --ingredients "aceite de coco" "menta" "zinc" --max-subset 2
+#
+#   tabla = sweep(base, precios=price_grid(5, 40, 8), ingredientes=["menta", "zinc"])
+#   response_surface(tabla)     # Ingredientes x Price con el rating predicho
+import argparse
+import itertools
+import sys
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from inference import INGREDIENTES_DOMINIO, load_assets, load_router
+
+SIN_INGREDIENTES = "(ninguno)"
+# Límite de variantes por barrido (la matriz de la rejilla se construye entera en memoria)
+MAX_VARIANTES = 500_000
+
+
+def price_grid(minimo, maximo, pasos):
+    return np.round(np.linspace(minimo, maximo, pasos), 2)
+
+
+# Subconjuntos de 0 a max_tamano ingredientes, en orden de tamaño
+def ingredient_subsets(ingredientes, max_tamano=1):
+    return [
+        subconjunto
+        for tamano in range(max_tamano + 1)
+        for subconjunto in itertools.combinations(ingredientes, tamano)
+    ]
+
+
+# Filas del bloque de un transformer para cada valor distinto de su columna, en CSR
+def _bloque(transformer, columnas, valores):
+    entrada = pd.DataFrame({columna: valores for columna in ([columnas] if isinstance(columnas, str) else columnas)})
+    salida = transformer.transform(entrada[columnas])
+    return sp.csr_matrix(salida) if not sp.isspmatrix_csr(salida) else salida
+
+
+# Matriz preprocesada de la rejilla: cada transformer del ColumnTransformer se aplica a los
+# valores distintos de su columna y sus filas se replican con los códigos de cada variante.
+# Es la misma matriz que preprocess() sobre la rejilla completa.
+def preprocess_grid(preprocessor, valores, codigos):
+    bloques = []
+    for nombre, transformer, columnas in preprocessor.transformers_:
+        posiciones = preprocessor.output_indices_[nombre]
+        if transformer == "drop" or posiciones.stop == posiciones.start:
+            continue
+        columna = columnas if isinstance(columnas, str) else columnas[0]
+        bloque = _bloque(transformer, columnas, valores[columna])
+        bloques.append((posiciones.start, bloque[codigos[columna]]))
+    bloques.sort(key=lambda par: par[0])
+    return sp.hstack([bloque for _, bloque in bloques], format="csr")
+
+
+def sweep(base, precios, ingredientes=INGREDIENTES_DOMINIO, tipos=None, max_tamano=1, reviews=None, assets=None,
+          router=None):
+    preprocessor, model_bajo, model_alto = assets or load_assets()
+    router = router or load_router(modelos={"modelo_bajo.pkl": model_bajo, "modelo_alto.pkl": model_alto})
+    tipos = list(dict.fromkeys([base["Tipo"]] if tipos is None else tipos))
+    reviews = list(dict.fromkeys([base["Reviews"]] if reviews is None else reviews))
+    precios = np.asarray(precios, dtype=np.float64)
+    subconjuntos = ingredient_subsets(ingredientes, max_tamano)
+
+    forma = (len(tipos), len(subconjuntos), len(precios), len(reviews))
+    n = int(np.prod(forma))
+    if n == 0:
+        raise ValueError("La rejilla del barrido está vacía")
+    if n > MAX_VARIANTES:
+        raise ValueError(f"Demasiadas variantes en el barrido: {n:,} (máximo {MAX_VARIANTES:,})")
+
+    descripcion = base.get("Product_Description")
+    descripcion = descripcion if isinstance(descripcion, str) else ""
+    textos = [" ".join([descripcion, *subconjunto]).strip() for subconjunto in subconjuntos]
+    codigo_tipo, codigo_texto, codigo_precio, codigo_reviews = np.indices(forma).reshape(4, n)
+
+    X_processed = preprocess_grid(
+        preprocessor,
+        {"Tipo": tipos, "Product_Description": textos, "Price": precios},
+        {"Tipo": codigo_tipo, "Product_Description": codigo_texto, "Price": codigo_precio},
+    )
+    reviews_variantes = np.asarray(reviews, dtype=np.float64)[codigo_reviews]
+    entradas = {
+        "Tipo": np.asarray(tipos, dtype=object)[codigo_tipo],
+        "Product_Description": np.asarray(textos, dtype=object)[codigo_texto],
+        "Price": precios[codigo_precio],
+        "Reviews": reviews_variantes,
+    }
+    predicciones, codigos = router.predict(X_processed, entradas)
+
+    etiquetas = [", ".join(subconjunto) or SIN_INGREDIENTES for subconjunto in subconjuntos]
+    return pd.DataFrame({
+        "Tipo": pd.Categorical.from_codes(codigo_tipo, tipos),
+        "Ingredientes": pd.Categorical.from_codes(codigo_texto, etiquetas),
+        "Price": precios[codigo_precio],
+        "Reviews": reviews_variantes,
+        "Predicted_Rating": predicciones,
+        "Modelo": pd.Categorical.from_codes(codigos, router.nombres),
+    })
+
+
+# Superficie de respuesta: rating predicho con una fila por combinación de los ejes que varían
+# (Tipo, Ingredientes, Reviews) y una columna por valor de `columnas`
+def response_surface(tabla, columnas="Price"):
+    filas = [
+        eje for eje in ("Tipo", "Ingredientes", "Price", "Reviews")
+        if eje != columnas and tabla[eje].nunique() > 1
+    ] or ["Ingredientes"]
+    return tabla.pivot_table(index=filas, columns=columnas, values="Predicted_Rating", aggfunc="first", observed=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de precio, ingredientes y Tipo sobre un producto base.")
+    parser.add_argument("--tipo", required=True, help="Tipo del producto base")
+    parser.add_argument("--description", default="", help="Descripción del producto base")
+    parser.add_argument("--price", type=float, help="Precio del producto base (si no hay --price-range)")
+    parser.add_argument("--reviews", type=float, nargs="+", default=[0], help="Número(s) de reseñas")
+    parser.add_argument("--price-range", type=float, nargs=2, metavar=("MIN", "MAX"))
+    parser.add_argument("--steps", type=int, default=10, help="Puntos de la rejilla de precios (10)")
+    parser.add_argument("--ingredients", nargs="*", default=INGREDIENTES_DOMINIO,
+                        help="Ingredientes a combinar (por defecto todos los del formulario)")
+    parser.add_argument("--max-subset", type=int, default=1, help="Ingredientes añadidos como máximo por variante (1)")
+    parser.add_argument("--tipos", nargs="+", help="Tipos a barrer (por defecto solo el del producto base)")
+    parser.add_argument("--output", help="CSV con una fila por variante")
+    args = parser.parse_args(argv)
+
+    if args.price_range is None and args.price is None:
+        parser.error("Indica --price o --price-range")
+    precios = price_grid(*args.price_range, args.steps) if args.price_range else [args.price]
+    base = {"Tipo": args.tipo, "Product_Description": args.description, "Reviews": args.reviews[0]}
+    tabla = sweep(base, precios, args.ingredients, args.tipos, args.max_subset, args.reviews)
+    if args.output:
+        tabla.to_csv(args.output, index=False)
+    mejor = tabla.loc[tabla["Predicted_Rating"].idxmax()]
+    print(response_surface(tabla).round(3).to_string())
+    print(
+        f"\n✅ {len(tabla):,} variantes. Mejor: {mejor['Predicted_Rating']:.3f} con "
+        f"{mejor['Ingredientes']} a {mejor['Price']:.2f} € ({mejor['Tipo']})",
+        file=sys.stderr
+    )
+
+
+if __name__ == "__main__":
+    main()
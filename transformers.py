@@ -1,96 +1,309 @@
+import hashlib
+import os
 import re
+import threading
 import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from itertools import filterfalse
+import numpy as np
+import pandas as pd
 from sklearn.base import BaseEstimator, TransformerMixin
-from nltk.corpus import stopwords
 
-# Transformador personalizado para limpiar texto
-class CleanText(BaseEstimator, TransformerMixin):
-    def __init__(self):
-        self.stop_words = set(stopwords.words("spanish"))
+# Stopwords en español incluidas en el repositorio (lista de NLTK), sin descargas al importar
+RUTA_STOPWORDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resources", "stopwords_spanish.txt")
 
-    def clean_text(self, texto):
-        if not isinstance(texto, str):
-            return ""
 
-        # Lista de términos compuestos
-        terminos_compuestos = [
-            "acido salicilico",
-            "acido hialuronico",
-            "vitamina c",
-            "aloe vera",
-            "manteca de karite",
-            "aceite de almendras",
-            "aceite de argan",
-            "aceite de coco",
-            "aceite de ricino",
-            "aceite de jojoba",
-            "aceite de romero",
-            "crecimiento capilar",
-            "caida del cabello",
-            "sal rosa"
-        ]
+@lru_cache(maxsize=None)
+def _stopwords_spanish():
+    with open(RUTA_STOPWORDS, encoding="utf-8") as f:
+        return frozenset(linea.strip() for linea in f if linea.strip())
 
-        # Unir términos compuestos con guiones
-        for termino in terminos_compuestos:
-            texto = re.sub(
-                r'\b' + re.escape(termino) + r'\b',
-                termino.replace(" ", "-"),
-                texto,
+# Términos compuestos que se unen con guiones antes de la limpieza
+TERMINOS_COMPUESTOS = (
+    "acido salicilico",
+    "acido hialuronico",
+    "vitamina c",
+    "aloe vera",
+    "manteca de karite",
+    "aceite de almendras",
+    "aceite de argan",
+    "aceite de coco",
+    "aceite de ricino",
+    "aceite de jojoba",
+    "aceite de romero",
+    "crecimiento capilar",
+    "caida del cabello",
+    "sal rosa"
+)
+
+PATRON_URL = re.compile(r'https?://\S+|www\.\S+')
+PATRON_PUNTUACION = re.compile(r'[^\w\s-]')
+
+# Pasada fusionada sobre el texto ya en ASCII: minúsculas y borrado de puntuación
+# en una sola llamada a bytes.translate (equivale a PATRON_PUNTUACION + lower())
+_TABLA_MINUSCULAS = bytes(ord(chr(c).lower()) if c < 128 else c for c in range(256))
+_BYTES_PUNTUACION = bytes(c for c in range(128) if PATRON_PUNTUACION.match(chr(c)))
+
+
+def _patron_trie(terminos):
+    # Alternancia en forma de trie: los términos que comparten prefijo se comprueban una vez
+    ramas = {}
+    for termino in terminos:
+        if termino:
+            ramas.setdefault(termino[0], []).append(termino[1:])
+    if not ramas:
+        return ""
+    alternativas = []
+    for caracter, restos in ramas.items():
+        sub = _patron_trie(restos)
+        if "" in restos:
+            sub = f"(?:{sub})?" if sub else ""
+        alternativas.append(re.escape(caracter) + sub)
+    return alternativas[0] if len(alternativas) == 1 else "(?:" + "|".join(alternativas) + ")"
+
+
+# Motor de normalización precompilado: una única alternancia (trie) para los términos
+# compuestos y una pasada fusionada para tildes, puntuación y minúsculas
+class TextNormalizer:
+    def __init__(self, terminos_compuestos=TERMINOS_COMPUESTOS):
+        self.terminos_compuestos = tuple(terminos_compuestos)
+        self._reemplazos = {termino: termino.replace(" ", "-") for termino in self.terminos_compuestos}
+        self._patrones = [
+            re.compile(re.escape(termino), flags=re.IGNORECASE) for termino in self.terminos_compuestos
+        ]
+        self._patron_terminos = None
+        if self.terminos_compuestos:
+            iniciales = "".join(sorted({re.escape(termino[0]) for termino in self.terminos_compuestos}))
+            self._patron_terminos = re.compile(
+                rf"(?=[{iniciales}])\b{_patron_trie(self.terminos_compuestos)}\b",
                 flags=re.IGNORECASE
             )
 
+    def _reemplazar(self, match):
+        encontrado = match.group()
+        reemplazo = self._reemplazos.get(encontrado.lower())
+        if reemplazo is None:
+            # Mayúsculas poco habituales (p. ej. 'ſ' o 'K' de Kelvin) que IGNORECASE acepta
+            for termino, patron in zip(self.terminos_compuestos, self._patrones):
+                if patron.fullmatch(encontrado):
+                    return self._reemplazos[termino]
+        return reemplazo
+
+    def __call__(self, texto):
+        if not isinstance(texto, str):
+            return ""
+
+        # Unir términos compuestos con guiones
+        if self._patron_terminos is not None:
+            texto = self._patron_terminos.sub(self._reemplazar, texto)
+
         # Limpieza estándar (conserva guiones)
-        texto = re.sub(r'https?://\S+|www\.\S+', '', texto)  # URLs
-        texto = unicodedata.normalize("NFD", texto).encode("ascii", "ignore").decode("utf-8")  # Tildes
-        texto = re.sub(r'[^\w\s-]', '', texto)  # Conserva guiones
-        texto = texto.lower().strip()  # Minúsculas y espacios
+        texto = PATRON_URL.sub('', texto)  # URLs
+        texto = unicodedata.normalize("NFD", texto).encode("ascii", "ignore")  # Tildes
+        texto = texto.translate(_TABLA_MINUSCULAS, _BYTES_PUNTUACION)  # Puntuación y minúsculas
+        return texto.decode("ascii").strip()
+
+
+# Entradas que se procesan en modo por lotes (columna de pandas o array 1-D de objetos)
+def _es_lote(X):
+    return isinstance(X, (pd.Series, np.ndarray)) and np.ndim(X) == 1
+
+
+def _valores_lote(X):
+    if isinstance(X, pd.Series):
+        return X.to_numpy(dtype=object)
+    return X
+
 
-        return texto
+# Caché de documentos compartida por CleanText y TokenizerText. Cada etapa memoiza su propia
+# transformación: la clave es la huella de su entrada junto con la etapa y su configuración, y el
+# valor su salida, así que la salida de cada transformador es la misma con la caché o sin ella.
+# Es un objeto del módulo (no de los transformadores), así que nunca entra en preprocessor.pkl.
+# LRU acotada por tamaño aproximado en bytes.
+class DocumentCache:
+    COSTE_ENTRADA = 120  # Bytes aproximados de clave, tupla y nodo del OrderedDict
+
+    def __init__(self, max_bytes=64 * 2**20):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def clave(texto, etapa=b""):
+        huella = hashlib.blake2b(etapa, digest_size=16)
+        huella.update(texto.encode("utf-8", "surrogatepass"))
+        return huella.digest()
+
+    # Consulta de un lote bajo un solo lock: valores guardados o None
+    def buscar(self, claves):
+        with self._lock:
+            entradas = self._entradas
+            resultado = []
+            for clave in claves:
+                valor = entradas.get(clave)
+                if valor is not None:
+                    entradas.move_to_end(clave)
+                resultado.append(valor)
+        return resultado
+
+    def guardar(self, pares):
+        with self._lock:
+            entradas = self._entradas
+            for clave, valor in pares:
+                anterior = entradas.pop(clave, None)
+                if anterior is not None:
+                    self.bytes -= len(anterior) + self.COSTE_ENTRADA
+                entradas[clave] = valor
+                self.bytes += len(valor) + self.COSTE_ENTRADA
+            while self.bytes > self.max_bytes and entradas:
+                _, valor = entradas.popitem(last=False)
+                self.bytes -= len(valor) + self.COSTE_ENTRADA
+                self.evictions += 1
+
+    def registrar(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def clear(self):
+        with self._lock:
+            self._entradas.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            consultas = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / consultas if consultas else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entradas),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    # Contadores en formato de texto de Prometheus
+    def metrics(self, prefijo="text_cache"):
+        stats = self.stats()
+        lineas = []
+        for nombre, tipo in [("hits", "counter"), ("misses", "counter"), ("evictions", "counter"),
+                             ("hit_rate", "gauge"), ("size", "gauge"), ("bytes", "gauge"), ("max_bytes", "gauge")]:
+            metrica = f"{prefijo}_{nombre}_total" if tipo == "counter" else f"{prefijo}_{nombre}"
+            lineas.append(f"# TYPE {metrica} {tipo}")
+            lineas.append(f"{metrica} {stats[nombre]}")
+        return "\n".join(lineas) + "\n"
+
+
+# Tamaño en MB con TEXT_CACHE_MAX_MB (64 por defecto, 0 la desactiva)
+_MAX_MB_CACHE = float(os.environ.get("TEXT_CACHE_MAX_MB", 64))
+CACHE_DOCUMENTOS = DocumentCache(int(_MAX_MB_CACHE * 2**20)) if _MAX_MB_CACHE > 0 else None
+
+
+# Identificador corto de una etapa y su configuración (parte de la clave de cada documento)
+def _etapa(nombre, configuracion):
+    return hashlib.blake2b("\0".join([nombre, *configuracion]).encode(), digest_size=8).digest()
+
+
+# Aplica funcion a cada texto del lote consultando la caché: una consulta por lote y, entre los
+# que faltan, una sola llamada por texto distinto
+def _memoizar(textos, cache, etapa, funcion):
+    claves = [cache.clave(texto, etapa) for texto in textos]
+    calculados = {}
+    salida = []
+    for texto, clave, valor in zip(textos, claves, cache.buscar(claves)):
+        if valor is None:
+            valor = calculados.get(clave)
+            if valor is None:
+                valor = calculados[clave] = funcion(texto)
+        salida.append(valor)
+    cache.registrar(len(salida) - len(calculados), len(calculados))
+    cache.guardar(calculados.items())
+    return salida
+
+
+# Transformador personalizado para limpiar texto
+class CleanText(BaseEstimator, TransformerMixin):
+    def __init__(self):
+        self.stop_words = set(_stopwords_spanish())
+
+    @property
+    def normalizer(self):
+        # Se compila una vez por transformador (también tras cargar preprocessor.pkl)
+        normalizer = self.__dict__.get("_normalizer")
+        if normalizer is None:
+            normalizer = self._normalizer = TextNormalizer()
+        return normalizer
+
+    def __getstate__(self):
+        # El motor compilado no forma parte del pickle
+        state = dict(super().__getstate__())
+        state.pop("_normalizer", None)
+        return state
+
+    def clean_text(self, texto):
+        return self.normalizer(texto)
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
+        if CACHE_DOCUMENTOS is not None:
+            textos = [texto if isinstance(texto, str) else "" for texto in _valores_lote(X)]
+            etapa = _etapa("CleanText", self.normalizer.terminos_compuestos)
+            limpios = _memoizar(textos, CACHE_DOCUMENTOS, etapa, self.normalizer)
+            return np.array(limpios, dtype=object) if _es_lote(X) else limpios
+        if _es_lote(X):
+            # Modo por lotes: Series/ndarray -> ndarray sin listas intermedias
+            valores = _valores_lote(X)
+            return np.fromiter(map(self.normalizer, valores), dtype=object, count=len(valores))
         return [self.clean_text(texto) for texto in X]
 
-from sklearn.base import BaseEstimator, TransformerMixin
-import nltk
-from nltk.corpus import stopwords
-
-# Descargar stopwords de NLTK
-nltk.download('stopwords')
+# Términos compuestos (ya unidos por CleanText) que nunca se filtran como stopwords
+TOKENS_COMPUESTOS = frozenset({
+    "acido-salicilico",
+    "acido-hialuronico",
+    "vitamina-c",
+    "aloe-vera",
+    "manteca-de-karite",
+    "aceite-de-almendras",
+    "aceite-de-argan",
+    "aceite-de-coco",
+    "aceite-de-ricino",
+    "aceite-de-jojoba",
+    "aceite-de-romero",
+    "crecimiento-capilar",
+    "caida-del-cabello"
+})
 
 class TokenizerText(BaseEstimator, TransformerMixin):
+    # Valor por defecto para instancias de preprocessor.pkl guardadas sin este atributo
+    terminos_compuestos = TOKENS_COMPUESTOS
+
     def __init__(self):
-        self.stop_words = set(stopwords.words("spanish"))
-        self.terminos_compuestos = {
-            "acido-salicilico",
-            "acido-hialuronico",
-            "vitamina-c",
-            "aloe-vera",
-            "manteca-de-karite",
-            "aceite-de-almendras",
-            "aceite-de-argan",
-            "aceite-de-coco",
-            "aceite-de-ricino",
-            "aceite-de-jojoba",
-            "aceite-de-romero",
-            "crecimiento-capilar",
-            "caida-del-cabello"
-        }
+        self.stop_words = set(_stopwords_spanish())
+        self.terminos_compuestos = set(TOKENS_COMPUESTOS)
 
     def fit(self, X, y=None):
         return self
 
     def transform(self, X):
-        # Debug: Verificar que terminos_compuestos está definido
-        # print(f"terminos_compuestos: {self.terminos_compuestos}")
-
-        # Dividir texto en tokens y filtrar stopwords
-        return [
-            ' '.join([
-                token for token in texto.split()
-                if token not in self.stop_words or token in self.terminos_compuestos
-            ])
-            for texto in X
-        ]
\ No newline at end of file
+        # Dividir texto en tokens y filtrar stopwords: una sola consulta por token
+        # contra el conjunto precalculado, filtrada en C con filterfalse
+        stop_words = frozenset(self.stop_words).difference(self.terminos_compuestos)
+        descartar = stop_words.__contains__
+        valores = _valores_lote(X)
+        tokenizar = lambda texto: ' '.join(filterfalse(descartar, texto.split()))  # noqa: E731
+        if CACHE_DOCUMENTOS is not None:
+            etapa = _etapa("TokenizerText", sorted(stop_words))
+            tokens = _memoizar(valores, CACHE_DOCUMENTOS, etapa, tokenizar)
+        else:
+            tokens = map(tokenizar, valores)
+        if _es_lote(X):
+            return np.fromiter(tokens, dtype=object, count=len(X))
+        return list(tokens)